@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+
+# Times metastringer's hot paths against a local WaybackStub and writes the results as JSON.
+#
+#   python benchmarks/run_benchmarks.py --rows 10000,100000 --latency-ms 20 --output bench.json
+#
+# The output schema is stable (schema_version, environment, config, results[]) so runs can be
+# diffed or plotted over time. Each result carries min/median/max seconds over --repeat runs.
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from metastringer import cache, classify, download, extract, sweep  # noqa: E402
+from wayback_stub import WaybackStub  # noqa: E402
+
+
+schema_version = 1
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Benchmark metastringer against a local stand-in Wayback server.")
+    parser.add_argument("--rows", default="10000,100000", help="Comma separated listing sizes to benchmark (e.g. 10000,100000,1000000).")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per benchmark.")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Artificial server latency per request.")
+    parser.add_argument("--server-rate", type=float, default=0.0, help="Server-side request budget per second before answering 429 (0: unlimited).")
+    parser.add_argument("--page-size", type=int, default=25000, help="Rows per CDX page served by the stub.")
+    parser.add_argument("--payload-kb", type=int, default=64, help="Padding added to generated PDF/OOXML payloads.")
+    parser.add_argument("--workers", type=int, default=8, help="Sweep download workers.")
+    parser.add_argument("--extract-workers", type=int, default=2, help="Sweep extraction workers.")
+    parser.add_argument("--extractor", choices=["auto", "native", "exiftool"], default="auto", help="Metadata extraction engine (as the tool's --extractor).")
+    parser.add_argument("--range-fetch", action="store_true", help="Read sweep documents with Range requests (as the tool's --range-fetch).")
+    parser.add_argument("--cdx-workers", type=int, default=0, help="Page-sharded CDX workers (0: sequential resume-key fetch).")
+    parser.add_argument("--sweep-files", type=int, default=200, help="Files downloaded in the option-5 sweep benchmark.")
+    parser.add_argument("--output", default=None, help="Write results JSON here (default: stdout).")
+    return parser.parse_args()
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def timed(function, repeat):
+    # Runs function `repeat` times with output suppressed; returns (timings, last return value)
+    timings, value = [], None
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            value = function()
+            timings.append(time.perf_counter() - start)
+    return timings, value
+
+
+def result(name, rows, timings, **extra):
+    return {
+        "benchmark": name,
+        "rows": rows,
+        "runs": len(timings),
+        "min_s": round(min(timings), 6),
+        "median_s": round(statistics.median(timings), 6),
+        "max_s": round(max(timings), 6),
+        "extra": extra,
+    }
+
+
+def configure_tool(base_url, args):
+    download.wayback_base_url = base_url
+    download.rate_limiter = download.AdaptiveTokenBucket(0, capacity=args.workers, min_rate=1.0, max_rate=1000000.0)
+    download.http_pool_size = max(args.workers, args.cdx_workers, 10)
+    download.http_session = None
+    sweep.sweep_workers = args.workers
+    sweep.reuse_results = False
+    sweep.extract_workers = args.extract_workers
+    sweep.range_fetch = args.range_fetch
+    extract.exiftool_pool_size = args.extract_workers
+    extract.extractor = args.extractor
+
+
+def run_for_size(rows, args):
+    results = []
+    stub = WaybackStub(rows, latency=args.latency_ms / 1000, rate=args.server_rate or None,
+                       page_size=args.page_size, payload_padding=args.payload_kb * 1024)
+    configure_tool(stub.start(), args)
+    try:
+        timings, (file_list, _, _, _) = timed(lambda: cache.fetch_file_list(stub.domain, True, args.cdx_workers), args.repeat)
+        results.append(result("fetch_file_list", rows, timings, captures=len(file_list) - 1))
+
+        def build_index():
+            classify.file_list_index = None
+            return classify.get_file_list_index(file_list)
+        timings, _ = timed(build_index, args.repeat)
+        results.append(result("index_build", rows, timings))
+
+        timings, listed = timed(lambda: classify.list_file_types(file_list, stub.domain), args.repeat)
+        results.append(result("list_file_types", rows, timings, mime_types=len(listed[3])))
+
+        matches = {}
+        for strictness in (0, 1, 2):
+            timings, matches[strictness] = timed(lambda: classify.find_matching_urls(file_list, "pdf", strictness), args.repeat)
+            results.append(result(f"process_filetype_strictness_{strictness}", rows, timings, matches=len(matches[strictness])))
+
+        if args.extractor != "exiftool" or extract.exiftool_exists():
+            samples = []
+            with contextlib.redirect_stdout(io.StringIO()):
+                for url, archive_number, _, _, _ in matches[1][:20]:
+                    samples.append(download.download_file(f"{download.wayback_base_url}/web/{archive_number}/{url}", bulk_operation=True))
+            samples = [path for path in samples if path]
+            timings, _ = timed(lambda: [extract.extract_metadata(path) for path in samples], args.repeat)
+            results.append(result("extract_metadata", rows, timings, files=len(samples), extractor=args.extractor))
+            for path in samples:
+                os.remove(path)
+        else:
+            results.append({"benchmark": "extract_metadata", "rows": rows, "skipped": "exiftool not installed"})
+
+        sweep_urls = matches[1][:args.sweep_files]
+        requests_before, throttled_before, bytes_before = stub.requests, stub.throttled, stub.bytes_sent
+        timings, tally = timed(lambda: sweep.test_files_for_metadata(sweep_urls, "pdf", stub.domain, 0, portion=False, verbosity=0), args.repeat)
+        results.append(result("option5_sweep", rows, timings, files=len(sweep_urls), with_metadata=tally["with_metadata"],
+                              requests=(stub.requests - requests_before) // args.repeat,
+                              throttled=(stub.throttled - throttled_before) // args.repeat,
+                              bytes=(stub.bytes_sent - bytes_before) // args.repeat, range_fetch=args.range_fetch))
+    finally:
+        stub.stop()
+        if extract.exiftool_pool:
+            extract.exiftool_pool.close()
+    return results
+
+
+def main():
+    args = parse_arguments()
+    sizes = [int(size) for size in args.rows.split(",") if size.strip()]
+    report = {
+        "schema_version": schema_version,
+        "environment": {
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "exiftool": extract.exiftool_exists(),
+        },
+        "config": {key: value for key, value in sorted(vars(args).items()) if key != "output"},
+        "results": [],
+    }
+    # The tool keeps its cache, results store and temp files relative to the working directory
+    original_directory = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="metastringer-bench-") as workdir:
+        os.chdir(workdir)
+        try:
+            for rows in sizes:
+                print(f"Benchmarking {rows} rows...", file=sys.stderr)
+                report["results"].extend(run_for_size(rows, args))
+        finally:
+            os.chdir(original_directory)
+
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output:
+            output.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+
+# Local stand-in for the parts of the Wayback Machine that metastringer talks to:
+#   /web/timemap/?...         CDX listing (showNumPages/page, limit/showResumeKey/resumeKey, from, fl)
+#   /web/timemap/?collapse=digest&url=...  revisions of one URL (matchType=exact) or of a directory
+#                             (matchType=prefix, narrowed by filter=original:<regex>)
+#   /web/{timestamp}/{url}    archived file download
+# Listings are synthetic and deterministic, so runs against the same row count are comparable.
+
+import io
+import json
+import math
+import re
+import threading
+import time
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+
+# (extension, MIME type, share of rows in percent)
+file_mix = [
+    ("pdf", "application/pdf", 30),
+    ("html", "text/html", 30),
+    ("jpg", "image/jpeg", 15),
+    ("docx", "application/vnd.openxmlformats-officedocument.wordprocessingml.document", 10),
+    ("doc", "application/msword", 5),
+    ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", 5),
+    ("css", "text/css", 5),
+]
+directories = ["docs", "files", "media", "uploads", "reports", "news", "about", "assets"]
+error_page_digest = "ERRORPAGE000000000000000000000000"
+
+
+def synthetic_row(domain, i):
+    # Cheap integer hash instead of random.Random so a million rows stay fast to generate
+    h = (i * 2654435761) % 4294967296
+    share = h % 100
+    for extension, mime_type, weight in file_mix:
+        if share < weight:
+            break
+        share -= weight
+    year = 2005 + (h >> 8) % 18
+    timestamp = f"{year}{1 + (h >> 12) % 12:02d}{1 + (h >> 16) % 28:02d}{(h >> 20) % 24:02d}0000"
+    digest = error_page_digest if extension == "html" and h % 7 == 0 else f"BENCH{i:027d}"
+    return {
+        "original": f"http://{domain}/{directories[(h >> 4) % len(directories)]}/file{i}.{extension}",
+        "mimetype": mime_type,
+        "timestamp": timestamp,
+        "endtimestamp": timestamp,
+        "groupcount": str(1 + h % 4),
+        "uniqcount": str(1 + (h >> 24) % 3),
+        "digest": digest,
+        "statuscode": "200",
+        "length": str(2000 + h % 200000),
+    }
+
+
+def revision_rows(domain, i):
+    # The listed capture, then one capture a year later for each further distinct payload
+    row = synthetic_row(domain, i)
+    rows = [row]
+    for revision in range(1, int(row["uniqcount"])):
+        timestamp = f"{int(row['timestamp'][:4]) + revision}{row['timestamp'][4:]}"
+        rows.append(dict(row, timestamp=timestamp, endtimestamp=timestamp, digest=f"BENCH{i:020d}REV{revision:06d}"))
+    return rows
+
+
+def pdf_payload(padding=0):
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 5 0 R >>",
+        b"<< /Author (bench-author) /Creator (Bench Writer 1.0) /Producer (metastringer stub) >>",
+        b"<< /Length %d >>\nstream\n" % padding + b"0" * padding + b"\nendstream",
+    ]
+    body = io.BytesIO()
+    body.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, content in enumerate(objects, start=1):
+        offsets.append(body.tell())
+        body.write(b"%d 0 obj\n" % number + content + b"\nendobj\n")
+    xref_offset = body.tell()
+    body.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for offset in offsets:
+        body.write(b"%010d 00000 n \n" % offset)
+    body.write(b"trailer\n<< /Size %d /Root 1 0 R /Info 4 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_offset))
+    return body.getvalue()
+
+
+def ooxml_payload(padding=0):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("[Content_Types].xml", '<?xml version="1.0" encoding="UTF-8"?><Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types"/>')
+        archive.writestr("_rels/.rels", '<?xml version="1.0" encoding="UTF-8"?><Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships"/>')
+        archive.writestr("word/document.xml", "<document/>")
+        archive.writestr(
+            "docProps/core.xml",
+            '<?xml version="1.0" encoding="UTF-8"?><cp:coreProperties xmlns:cp="http://schemas.openxmlformats.org/package/2006/metadata/core-properties" '
+            'xmlns:dc="http://purl.org/dc/elements/1.1/"><dc:creator>bench-author</dc:creator>'
+            '<cp:lastModifiedBy>bench-editor</cp:lastModifiedBy></cp:coreProperties>')
+        archive.writestr(
+            "docProps/app.xml",
+            '<?xml version="1.0" encoding="UTF-8"?><Properties xmlns="http://schemas.openxmlformats.org/officeDocument/2006/extended-properties">'
+            '<Application>Bench Office</Application></Properties>')
+        archive.writestr(zipfile.ZipInfo("word/media/padding.bin"), b"0" * padding)
+    return buffer.getvalue()
+
+
+class WaybackStub:
+    def __init__(self, rows, domain="bench.example", latency=0.0, rate=None, page_size=25000, payload_padding=0):
+        self.rows = rows
+        self.domain = domain
+        self.latency = latency
+        self.rate = rate  # Requests per second before answering 429; None for unlimited
+        self.page_size = page_size
+        self.payloads = {
+            "pdf": pdf_payload(payload_padding),
+            "docx": ooxml_payload(payload_padding),
+            "xlsx": ooxml_payload(payload_padding),
+        }
+        self.lock = threading.Lock()
+        self.tokens = 0.0
+        self.updated = time.monotonic()
+        self.requests = 0
+        self.throttled = 0
+        self.bytes_sent = 0
+        self.server = None
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                stub.handle(self)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self.base_url
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+
+    def allow(self):
+        with self.lock:
+            self.requests += 1
+            if not self.rate:
+                return True
+            now = time.monotonic()
+            self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            self.throttled += 1
+            return False
+
+    def handle(self, request):
+        if self.latency:
+            time.sleep(self.latency)
+        if not self.allow():
+            self.send(request, 429, b"Too Many Requests", headers={"Retry-After": "1"})
+            return
+        parsed = urlparse(request.path)
+        if parsed.path.startswith("/web/timemap"):
+            self.handle_timemap(request, parse_qs(parsed.query))
+        elif parsed.path.startswith("/web/"):
+            self.handle_download(request, request.path[len("/web/"):].split("/", 1)[-1])
+        else:
+            self.send(request, 404, b"Not Found")
+
+    def handle_timemap(self, request, query):
+        first = lambda name, default=None: query.get(name, [default])[0]
+        if first("collapse") == "digest":
+            self.handle_revisions(request, query)
+            return
+        if first("showNumPages"):
+            self.send(request, 200, str(math.ceil(self.rows / self.page_size)).encode())
+            return
+        fields = (first("fl") or "original,mimetype,timestamp,endtimestamp,groupcount,uniqcount").split(",")
+        if first("page") is not None:
+            start = int(first("page")) * self.page_size
+            end = min(self.rows, start + self.page_size)
+        else:
+            start = int(first("resumeKey") or 0)
+            end = min(self.rows, start + int(first("limit") or self.rows))
+        from_timestamp = first("from")
+        resume = first("showResumeKey") and first("page") is None and end < self.rows
+
+        def lines():
+            yield json.dumps(fields)
+            for i in range(start, end):
+                row = synthetic_row(self.domain, i)
+                if from_timestamp and row["timestamp"] < from_timestamp:
+                    continue
+                # A listed length never understates the payload served, as with real archive records
+                payload = self.payloads.get(row["original"].rsplit(".", 1)[-1])
+                if payload and len(payload) > int(row["length"]):
+                    row["length"] = str(len(payload))
+                yield json.dumps([row.get(field, "") for field in fields])
+            if resume:
+                yield "[]"
+                yield json.dumps([str(end)])
+
+        self.send_chunked(request, lines())
+
+    def handle_revisions(self, request, query):
+        fields = query.get("fl", ["original,mimetype,timestamp,digest"])[0].split(",")
+        target = query.get("url", [""])[0].split("://", 1)[-1]
+        exact = query.get("matchType", ["exact"])[0] == "exact"
+        patterns = [re.compile(spec[len("original:"):]) for spec in query.get("filter", []) if spec.startswith("original:")]
+        rows = [fields]
+        for i in range(self.rows):
+            original = synthetic_row(self.domain, i)["original"].split("://", 1)[-1]
+            if original != target if exact else not original.startswith(target):
+                continue
+            for row in revision_rows(self.domain, i):
+                if all(pattern.fullmatch(row["original"]) for pattern in patterns):
+                    rows.append([row.get(field, "") for field in fields])
+        self.send(request, 200, json.dumps(rows).encode(), "application/json")
+
+    def handle_download(self, request, original):
+        extension = original.rsplit(".", 1)[-1].lower() if "." in original else ""
+        payload = self.payloads.get(extension, b"<html><body>archived page</body></html>")
+        content_type = "application/pdf" if extension == "pdf" else "application/octet-stream"
+        ranged = request.headers.get("Range")
+        if ranged and ranged.startswith("bytes="):
+            payload, status, extra = self.slice_range(payload, ranged[len("bytes="):])
+            self.send(request, status, payload, content_type, extra)
+        else:
+            self.send(request, 200, payload, content_type, {"Accept-Ranges": "bytes"})
+
+    def slice_range(self, payload, spec):
+        first, _, last = spec.partition("-")
+        size = len(payload)
+        if not first:
+            start, end = max(0, size - int(last)), size - 1
+        else:
+            start, end = int(first), min(size - 1, int(last) if last else size - 1)
+        return payload[start:end + 1], 206, {"Content-Range": f"bytes {start}-{end}/{size}", "Accept-Ranges": "bytes"}
+
+    def send(self, request, status, body, content_type="text/plain", headers=None):
+        request.send_response(status)
+        request.send_header("Content-Type", content_type)
+        request.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            request.send_header(name, value)
+        request.end_headers()
+        request.wfile.write(body)
+        with self.lock:
+            self.bytes_sent += len(body)
+
+    def send_chunked(self, request, lines, batch=5000):
+        request.send_response(200)
+        request.send_header("Content-Type", "application/json")
+        request.send_header("Transfer-Encoding", "chunked")
+        request.end_headers()
+        pending = []
+        sent = 0
+
+        def flush(text):
+            nonlocal sent
+            data = text.encode()
+            request.wfile.write(b"%x\r\n" % len(data) + data + b"\r\n")
+            sent += len(data)
+
+        first = True
+        for line in lines:
+            pending.append(("[" if first else ",\n") + line)
+            first = False
+            if len(pending) >= batch:
+                flush("".join(pending))
+                pending = []
+        flush("".join(pending) + "]")
+        request.wfile.write(b"0\r\n\r\n")
+        with self.lock:
+            self.bytes_sent += sent
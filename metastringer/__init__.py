@@ -0,0 +1,2 @@
+# metastringer: search the Wayback Machine for files of a given type and mine their metadata.
+# Run with `python -m metastringer`. Submodules import their heavy dependencies on first use.
@@ -0,0 +1,160 @@
+# Domain-wide index of the names found in metadata: every distinct Author, Creator and Producer value
+# with how many captures carry it, the first and last capture timestamps and example URLs. Sweeps add
+# each result as it arrives, so reports come straight from ./cache/metadata_index.sqlite.
+
+import atexit
+import os
+import threading
+from collections import defaultdict
+
+from .console import blue_start, blue_end, green_start, green_end, red_start, red_end, italics_start, italics_end
+from .instrumentation import metrics
+
+
+metadata_index_path = "./cache/metadata_index.sqlite"
+# Keys of process_metadata output that are aggregated
+indexed_keys = ("Author", "Creator", "Producer")
+# Example URLs shown per value in reports
+report_examples = 3
+
+
+class MetadataIndex:
+    # metadata_values holds the running counters; metadata_sightings has one row per (value, capture),
+    # which keeps counting idempotent when the same capture is reported again (reused or retested results)
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        import sqlite3
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        with self.lock, self.connection:
+            self.connection.execute("""CREATE TABLE IF NOT EXISTS metadata_values (
+                domain TEXT NOT NULL,
+                field TEXT NOT NULL,
+                value TEXT NOT NULL,
+                captures INTEGER NOT NULL,
+                first_seen TEXT NOT NULL,
+                last_seen TEXT NOT NULL,
+                PRIMARY KEY (domain, field, value))""")
+            self.connection.execute("""CREATE TABLE IF NOT EXISTS metadata_sightings (
+                domain TEXT NOT NULL,
+                field TEXT NOT NULL,
+                value TEXT NOT NULL,
+                original TEXT NOT NULL,
+                timestamp TEXT NOT NULL,
+                filetype TEXT,
+                PRIMARY KEY (domain, field, value, original, timestamp))""")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS sightings_domain ON metadata_sightings (domain, filetype)")
+
+    def add(self, domain, filetype, original, timestamp, metadata):
+        # Counts each value of a capture's metadata once; returns the number of new sightings
+        sightings = [(key, value) for key in indexed_keys for value in indexed_values(metadata.get(key))]
+        if not sightings:
+            return 0
+        added = 0
+        timestamp = str(timestamp)
+        with self.lock, self.connection:
+            for field, value in sightings:
+                if not self.connection.execute("INSERT OR IGNORE INTO metadata_sightings VALUES (?, ?, ?, ?, ?, ?)",
+                                               (domain, field, value, original, timestamp, filetype)).rowcount:
+                    continue
+                added += 1
+                self.connection.execute("""INSERT INTO metadata_values VALUES (?, ?, ?, 1, ?, ?)
+                    ON CONFLICT (domain, field, value) DO UPDATE SET captures = captures + 1,
+                        first_seen = min(first_seen, excluded.first_seen), last_seen = max(last_seen, excluded.last_seen)""",
+                                        (domain, field, value, timestamp, timestamp))
+        if added:
+            metrics.increment("index_sightings", added)
+        return added
+
+    def has_domain(self, domain):
+        with self.lock:
+            return self.connection.execute("SELECT 1 FROM metadata_values WHERE domain = ? LIMIT 1", (domain,)).fetchone() is not None
+
+    def report(self, domain, field=None, filetype=None, limit=None):
+        # [(field, value, captures, first_seen, last_seen, [example URLs])], most frequent first per field.
+        # A filetype filter is answered from the sightings, the domain-wide view from the counters.
+        clauses, params = ["domain = ?"], [domain]
+        if field:
+            clauses.append("field = ?")
+            params.append(field)
+        if filetype:
+            clauses.append("filetype = ?")
+            params.append(filetype)
+            source = f"""SELECT field, value, COUNT(*), MIN(timestamp), MAX(timestamp)
+                FROM metadata_sightings WHERE {' AND '.join(clauses)} GROUP BY field, value"""
+        else:
+            source = f"SELECT field, value, captures, first_seen, last_seen FROM metadata_values WHERE {' AND '.join(clauses)}"
+        with self.lock:
+            rows = self.connection.execute(f"{source} ORDER BY field, 3 DESC, value", params).fetchall()
+            if limit:
+                per_field = defaultdict(int)
+                kept = []
+                for row in rows:
+                    per_field[row[0]] += 1
+                    if per_field[row[0]] <= limit:
+                        kept.append(row)
+                rows = kept
+            report = []
+            for field_name, value, captures, first_seen, last_seen in rows:
+                examples = self.connection.execute(
+                    "SELECT original FROM metadata_sightings WHERE domain = ? AND field = ? AND value = ?"
+                    f"{' AND filetype = ?' if filetype else ''} ORDER BY timestamp LIMIT ?",
+                    [domain, field_name, value] + ([filetype] if filetype else []) + [report_examples]).fetchall()
+                report.append((field_name, value, captures, first_seen, last_seen, [original for original, in examples]))
+        return report
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+
+def indexed_values(value):
+    # ExifTool gives a list for repeated tags (e.g. XMP dc:creator) and numbers for numeric-looking text
+    values = value if isinstance(value, list) else [value]
+    return [str(item).strip() for item in values if item is not None and str(item).strip()]
+
+
+metadata_index = None
+
+
+def get_metadata_index():
+    global metadata_index
+    if metadata_index is None:
+        metadata_index = MetadataIndex(metadata_index_path)
+        atexit.register(metadata_index.close)
+    return metadata_index
+
+
+def index_stored_results(domain):
+    # Adds results stored before the index existed (or by an older version), without downloading anything
+    from .results import get_results_store
+    index = get_metadata_index()
+    added = 0
+    for original, timestamp, outcome, metadata, _ in get_results_store().query(domain, outcome="metadata"):
+        added += index.add(domain, None, original, timestamp, metadata)
+    return added
+
+
+def format_capture_date(timestamp):
+    return f"{timestamp[:4]}-{timestamp[4:6]}-{timestamp[6:8]}" if len(timestamp) >= 8 else timestamp
+
+
+def print_metadata_report(domain, filetype=None, limit=20):
+    index = get_metadata_index()
+    if not index.has_domain(domain) and index_stored_results(domain):
+        print(f"{italics_start}Indexed earlier stored results for {domain}.{italics_end}")
+    report = index.report(domain, filetype=filetype, limit=limit)
+    if not report:
+        print(f"{red_start}No Author, Creator or Producer values indexed for {domain}{f' ({filetype})' if filetype else ''}.{red_end}")
+        return
+    current_field = None
+    for field, value, captures, first_seen, last_seen, examples in report:
+        if field != current_field:
+            current_field = field
+            print(f"\n{blue_start}{field}{blue_end}")
+        seen = format_capture_date(first_seen) if first_seen == last_seen else f"{format_capture_date(first_seen)} - {format_capture_date(last_seen)}"
+        print(f"  {green_start}{captures:>6}{green_end}  {value}  {italics_start}({seen}){italics_end}")
+        for example in examples:
+            print(f"          {example}")
@@ -0,0 +1,123 @@
+# Headless --batch mode: domains are spread over worker processes, each running full sweeps without prompts
+
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import redirect_stdout
+from urllib.parse import urlparse
+
+from . import download, extract, sweep
+from .aggregate import get_metadata_index
+from .cache import fetch_file_list
+from .cdx import remove_www_prefix
+from .classify import find_matching_urls
+from .cli import configure_runtime
+from .console import blue_start, green_start, green_end, red_start, red_end
+from .instrumentation import metrics
+from .mappings import strictness_2_mime_mapping
+from .results import JSONLSink, result_sinks
+from .revisions import find_revisions
+from .sweep import test_files_for_metadata
+
+
+def read_batch_file(path, default_extensions):
+    # Each line: a domain, optionally followed by extensions (space or comma separated); '#' starts a comment.
+    # Lines naming the same domain (with or without www.) become one job with their extensions merged, as
+    # concurrent jobs for one domain would share its cache and journal files.
+    jobs = {}
+    with open(path, encoding='utf-8') as batch_file:
+        for line in batch_file:
+            parts = line.split('#', 1)[0].replace(',', ' ').split()
+            if parts:
+                extensions = [part.lstrip('.').lower() for part in parts[1:]] or default_extensions
+                merged = jobs.setdefault(remove_www_prefix(parts[0].lower()), [])
+                merged.extend(extension for extension in extensions if extension not in merged)
+    return list(jobs.items())
+
+
+def init_batch_worker(args, host_slot):
+    configure_runtime(args, rate_share=max(1, args.batch_workers))
+    download.host_semaphores[urlparse(download.wayback_base_url).hostname] = host_slot
+
+
+def run_batch_job(domain, extensions, args):
+    # Runs enumeration and a full metadata sweep per extension for one domain, without prompts.
+    # Console output goes to <output-dir>/<domain>.log; the result is written to <domain>.json
+    # and every tested capture is streamed to <domain>.results.jsonl.
+    start_time = time.time()
+    metrics.reset()
+    result = {"domain": domain, "captures": 0, "mime_types": 0, "extensions": {}, "error": None}
+    results_path = os.path.join(args.output_dir, f"{domain}.results.jsonl")
+    if os.path.exists(results_path):
+        os.remove(results_path)
+    result_sinks[:] = [JSONLSink(results_path)]
+    with open(os.path.join(args.output_dir, f"{domain}.log"), 'w', encoding='utf-8') as log, redirect_stdout(log):
+        sweep.sweep_deadline = time.monotonic() + args.domain_timeout if args.domain_timeout else None
+        try:
+            file_list, _, unique_mime_types_count, _ = fetch_file_list(domain, args.nocache, args.cdx_workers, args.refresh)
+            result["captures"] = len(file_list) - 1
+            result["mime_types"] = unique_mime_types_count
+            for extension in extensions:
+                matching_urls = find_matching_urls(file_list, extension, args.strictness)
+                print(f"\n[{extension}] {len(matching_urls)} matching files")
+                if matching_urls:
+                    result["extensions"][extension] = test_files_for_metadata(matching_urls, extension, domain, args.rate_limit, portion=False, verbosity=args.verbosity, strictness=args.strictness,
+                                                                              revisions=find_revisions(file_list, matching_urls, extension, args.strictness))
+                else:
+                    result["extensions"][extension] = {"filetype": extension, "matching": 0, "tested": 0, "skipped_repeats": 0, "with_metadata": 0,
+                                                       "percentage": 0.0, "complete": True}
+        except SystemExit:
+            result["error"] = "CDX listing could not be fetched (see log)"
+        except Exception as e:
+            result["error"] = repr(e)
+        finally:
+            sweep.sweep_deadline = None
+            download.remove_worker_directories()
+            if extract.exiftool_pool:
+                extract.exiftool_pool.close()
+            for sink in result_sinks:
+                sink.close()
+            result_sinks.clear()
+    if not result["error"]:
+        # The domain's most frequent names, so a batch run can be scanned without --metadata-report
+        result["metadata_index"] = {}
+        for field, value, captures, first_seen, last_seen, examples in get_metadata_index().report(domain, limit=args.report_limit):
+            result["metadata_index"].setdefault(field, []).append({"value": value, "captures": captures, "first_seen": first_seen,
+                                                                   "last_seen": last_seen, "examples": examples})
+    result["elapsed"] = round(time.time() - start_time, 2)
+    result["metrics"] = metrics.snapshot()
+    with open(os.path.join(args.output_dir, f"{domain}.json"), 'w', encoding='utf-8') as result_file:
+        json.dump(result, result_file, indent=2)
+    return result
+
+
+def run_batch(args):
+    default_extensions = [ext.strip('. ').lower() for ext in (args.ext or args.filetype or "").split(',') if ext.strip('. ')]
+    jobs = read_batch_file(args.batch, default_extensions or list(strictness_2_mime_mapping))
+    if not os.path.exists(args.output_dir):
+        os.makedirs(args.output_dir)
+    print(f"Batch: {green_start}{len(jobs)}{green_end} domains, {args.batch_workers} at a time. Results in {args.output_dir}\n")
+
+    host_slot = multiprocessing.BoundedSemaphore(max(1, args.host_concurrency))
+    failed = 0
+    with ProcessPoolExecutor(max_workers=max(1, args.batch_workers), initializer=init_batch_worker, initargs=(args, host_slot)) as executor:
+        futures = {executor.submit(run_batch_job, domain, extensions, args): domain for domain, extensions in jobs}
+        # Domains are reported as they finish, so a slow one never holds up the rest
+        for future in as_completed(futures):
+            domain = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {"domain": domain, "extensions": {}, "error": repr(e)}
+            # Jobs run in worker processes; their metrics are added here for --metrics-file
+            metrics.merge(result.get("metrics", {}))
+            if result["error"]:
+                failed += 1
+                print(f"{red_start}[-]{red_end} {domain}: {result['error']}")
+                continue
+            found = sum(summary["with_metadata"] for summary in result["extensions"].values())
+            tested = sum(summary["tested"] for summary in result["extensions"].values())
+            print(f"{green_start if found else blue_start}[+]{green_end} {domain}: {found}/{tested} tested files contained targeted metadata ({result['elapsed']:.0f}s)")
+    print(f"\nBatch complete: {len(jobs) - failed}/{len(jobs)} domains succeeded.")
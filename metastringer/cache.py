@@ -0,0 +1,271 @@
+# Columnar on-disk cache of CDX listings (./cache/cache_<domain>.mscache)
+
+import itertools
+import json
+import os
+import sys
+import time
+import zipfile
+from array import array
+
+from .cdx import CDXError, cdx_fields, stream_cdx_rows, stream_cdx_rows_parallel
+from .classify import extract_extension_from_url
+from .console import green_start, green_end
+from .instrumentation import metrics
+
+
+def fetch_file_list(domain, bypass_cache=False, cdx_workers=0, refresh=False):
+    cache_dir = "./cache"
+    cache_filename = f"cache_{domain}.mscache"
+    cache_filepath = os.path.join(cache_dir, cache_filename)
+
+    if not os.path.exists(cache_dir):
+        os.makedirs(cache_dir)
+
+    # Check if cache file exists and is not older than 14 days (or can be brought up to date)
+    if not bypass_cache and os.path.exists(cache_filepath) and (refresh or time.time() - os.path.getmtime(cache_filepath) < 14 * 86400):
+        try:
+            file_list = ColumnarFileList(cache_filepath)
+            if refresh and file_list.newest_timestamp():
+                return refresh_file_list(domain, file_list, cache_filepath, cdx_workers)
+            if not refresh:
+                cache_age = (time.time() - os.path.getmtime(cache_filepath)) / 86400  # Cache age in days
+                return file_list, 0.0, file_list.unique_count("mimetype"), cache_age
+        except (zipfile.BadZipFile, KeyError, ValueError):
+            print("Corrupted cache file. Fetching fresh data.")
+            # Continue to fetch new data if cache is corrupted
+
+    # Fetch new data if cache is outdated or doesn't exist
+    start_time = time.time()
+    try:
+        # Rows go straight into compact column arrays, so the response body is never held in memory
+        writer = None
+        with metrics.timer("cdx_fetch"):
+            rows = stream_cdx_rows_parallel(domain, cdx_workers) if cdx_workers > 0 else stream_cdx_rows(domain)
+            for row in rows:
+                if writer is None:
+                    writer = ColumnarCacheWriter(row)
+                else:
+                    writer.add(row)
+        writer = writer or ColumnarCacheWriter(cdx_fields.split(','))
+        write_cache_file(writer, cache_filepath)
+    except CDXError as e:
+        print(f"Failed to fetch data for {domain}. {e}")
+        sys.exit(1)
+    server_response_time = time.time() - start_time
+    file_list = ColumnarFileList(cache_filepath)
+    return file_list, server_response_time, file_list.unique_count("mimetype"), 0  # 0 for cache_age indicates fresh fetch
+
+
+def refresh_file_list(domain, cached_list, cache_filepath, cdx_workers=0):
+    # Asks CDX only for captures since the newest cached timestamp and merges them into the cache
+    since = cached_list.newest_timestamp()
+    start_time = time.time()
+    try:
+        rows = stream_cdx_rows_parallel(domain, cdx_workers, since) if cdx_workers > 0 else stream_cdx_rows(domain, from_timestamp=since)
+        delta = list(rows)
+    except CDXError as e:
+        print(f"Failed to refresh data for {domain}. {e}")
+        sys.exit(1)
+    server_response_time = time.time() - start_time
+
+    # Cached rows are streamed into the new cache one at a time; only the (small) delta is held by URL
+    header = cached_list.header
+    delta_rows = {}
+    for row in delta[1:]:
+        values = dict(zip(delta[0], row))
+        delta_rows.setdefault(values.get("original"), values)
+
+    original = header.index("original")
+    writer = ColumnarCacheWriter(header)
+    for row in itertools.islice(cached_list, 1, None):
+        values = delta_rows.pop(row[original], None)
+        writer.add(merge_collapsed_row(header, row, values) if values else row)
+    new_urls = list(delta_rows)
+    for values in delta_rows.values():
+        writer.add([values.get(name, "") for name in header])
+    write_cache_file(writer, cache_filepath)
+
+    print(f"\nRefreshed cache since {since}: {green_start}{len(new_urls)}{green_end} new URLs ({len(delta[1:])} URLs captured since then).")
+    for url in new_urls[:20]:
+        print(f"  {green_start}[new]{green_end} {url}")
+    if len(new_urls) > 20:
+        print(f"  ...and {len(new_urls) - 20} more")
+
+    file_list = ColumnarFileList(cache_filepath)
+    return file_list, server_response_time, file_list.unique_count("mimetype"), 0
+
+
+def merge_collapsed_row(header, row, values):
+    # Merges a URL's newer captures (one collapse=urlkey delta row) into its cached row, as a full listing
+    # would report them: timestamp, digest, length and mimetype stay those of the first capture,
+    # endtimestamp is the newest one and the counts cover both ranges. from= is inclusive, so a delta
+    # starting at the cached endtimestamp repeats that capture and it is counted once. uniqcount can
+    # only drop a digest the two ranges are known to share, so it may overcount repeats of older digests.
+    existing = dict(zip(header, row))
+    end = existing.get("endtimestamp") or existing.get("timestamp") or ""
+    first = values.get("timestamp") or ""
+    newest = values.get("endtimestamp") or first
+    if not existing.get("timestamp"):
+        for name in ("timestamp", "digest", "length", "mimetype"):
+            existing[name] = values.get(name, "")
+    elif newest <= end:
+        return row
+    repeated = bool(first) and first <= end
+    shared_digest = repeated or bool(values.get("digest")) and values.get("digest") == existing.get("digest")
+    if existing.get("groupcount", "").isdigit() and values.get("groupcount", "").isdigit():
+        existing["groupcount"] = str(int(existing["groupcount"]) + int(values["groupcount"]) - repeated)
+    if existing.get("uniqcount", "").isdigit() and values.get("uniqcount", "").isdigit():
+        uniqcount = int(existing["uniqcount"]) + int(values["uniqcount"]) - shared_digest
+        if existing.get("groupcount", "").isdigit():
+            uniqcount = min(uniqcount, int(existing["groupcount"]))
+        existing["uniqcount"] = str(uniqcount)
+    existing["endtimestamp"] = max(newest, end)
+    return [existing.get(name, "") for name in header]
+
+
+def write_cache_file(writer, cache_filepath):
+    # Written beside the cache and swapped in, so an interrupted write never corrupts it
+    temp_filepath = cache_filepath + ".part"
+    try:
+        with metrics.timer("cache_write"):
+            writer.write(temp_filepath)
+        os.replace(temp_filepath, cache_filepath)
+    finally:
+        if os.path.exists(temp_filepath):
+            os.remove(temp_filepath)
+
+
+# Columnar cache layout: integer columns are packed arrays, repeated strings are interned into a
+# per-column dictionary, everything else is one UTF-8 blob plus row offsets. Each column is a
+# separate deflated zip member so it can be loaded on its own.
+cache_int_columns = {"timestamp": "Q", "endtimestamp": "Q", "groupcount": "I", "uniqcount": "I", "length": "Q"}
+cache_interned_columns = ("mimetype", "extension")
+
+
+class ColumnarCacheWriter:
+    def __init__(self, header):
+        self.header = list(header)
+        self.row_count = 0
+        self.columns = {}
+        for name in self.header + ["extension"]:
+            if name in cache_int_columns:
+                self.columns[name] = array(cache_int_columns[name])
+            elif name in cache_interned_columns:
+                self.columns[name] = ({}, array('I'))
+            else:
+                self.columns[name] = (bytearray(), array('Q', [0]))
+
+    def add(self, row):
+        values = dict(zip(self.header, row))
+        values["extension"] = extract_extension_from_url(values.get("original") or "")
+        for name, column in self.columns.items():
+            value = values.get(name)
+            if name in cache_int_columns:
+                column.append(int(value) if value and str(value).isdigit() else 0)
+            elif name in cache_interned_columns:
+                dictionary, codes = column
+                codes.append(dictionary.setdefault(value, len(dictionary)))
+            else:
+                blob, offsets = column
+                blob += (value or "").encode('utf-8')
+                offsets.append(len(blob))
+        self.row_count += 1
+
+    def write(self, path):
+        meta = {"header": self.header, "rows": self.row_count, "byteorder": sys.byteorder, "dictionaries": {}}
+        with zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            for name, column in self.columns.items():
+                if name in cache_int_columns:
+                    archive.writestr(f"{name}.col", column.tobytes())
+                elif name in cache_interned_columns:
+                    dictionary, codes = column
+                    meta["dictionaries"][name] = list(dictionary)
+                    archive.writestr(f"{name}.col", codes.tobytes())
+                else:
+                    blob, offsets = column
+                    archive.writestr(f"{name}.col", bytes(blob))
+                    archive.writestr(f"{name}.offsets", offsets.tobytes())
+            archive.writestr("meta.json", json.dumps(meta))
+
+
+class ColumnarFileList:
+    # Read-only, list-like view of a columnar cache (row 0 is the header, as in the CDX JSON output).
+    # Columns are decompressed the first time they are needed.
+    def __init__(self, path):
+        self.path = path
+        with zipfile.ZipFile(path) as archive:
+            self.meta = json.loads(archive.read("meta.json"))
+        self.header = self.meta["header"]
+        self.row_count = self.meta["rows"]
+        self.loaded = {}
+
+    def read_member(self, member):
+        with metrics.timer("cache_read"), zipfile.ZipFile(self.path) as archive:
+            return archive.read(member)
+
+    def load_array(self, member, typecode):
+        values = array(typecode)
+        values.frombytes(self.read_member(member))
+        if self.meta["byteorder"] != sys.byteorder:
+            values.byteswap()
+        return values
+
+    def column(self, name):
+        # Integer columns and interned codes come back as arrays; text columns as (blob, offsets)
+        if name not in self.loaded:
+            if name in cache_int_columns:
+                self.loaded[name] = self.load_array(f"{name}.col", cache_int_columns[name])
+            elif name in cache_interned_columns:
+                self.loaded[name] = self.load_array(f"{name}.col", 'I')
+            else:
+                self.loaded[name] = (self.read_member(f"{name}.col"), self.load_array(f"{name}.offsets", 'Q'))
+        return self.loaded[name]
+
+    def dictionary(self, name):
+        return self.meta["dictionaries"][name]
+
+    def newest_timestamp(self):
+        # Latest capture timestamp in the cache as a 14-digit string, or None if there are no rows
+        newest = 0
+        for name in ("timestamp", "endtimestamp"):
+            if name in self.header and self.row_count:
+                newest = max(newest, max(self.column(name)))
+        return str(newest) if newest else None
+
+    def unique_count(self, name):
+        return len(self.dictionary(name))
+
+    def values(self, name):
+        # Per-row values of a column as a list (interned strings are shared, not copied)
+        if name in cache_interned_columns:
+            dictionary = self.dictionary(name)
+            return [dictionary[code] for code in self.column(name)]
+        return [self.value(name, position) for position in range(self.row_count)]
+
+    def value(self, name, position):
+        if name in cache_int_columns:
+            number = self.column(name)[position]
+            return str(number) if number or name not in ("timestamp", "endtimestamp") else ""
+        if name in cache_interned_columns:
+            return self.dictionary(name)[self.column(name)[position]]
+        blob, offsets = self.column(name)
+        return blob[offsets[position]:offsets[position + 1]].decode('utf-8')
+
+    def __len__(self):
+        return self.row_count + 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if index == 0:
+            return list(self.header)
+        if not 0 < index < len(self):
+            raise IndexError("file list index out of range")
+        return [self.value(name, index - 1) for name in self.header]
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
@@ -0,0 +1,170 @@
+# Wayback CDX client: streams a domain's capture listing, sequentially or as parallel pages
+
+import codecs
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+
+from . import download
+from .download import http_get
+from .instrumentation import metrics, profiled
+
+
+# Rows requested per CDX page; pages are chained with showResumeKey/resumeKey
+cdx_page_size = 50000
+cdx_fields = "original,mimetype,timestamp,endtimestamp,groupcount,uniqcount,digest,length"
+# Page-sharded (showNumPages) enumeration: attempts and timeout per page
+cdx_page_retries = 3
+cdx_page_timeout = 120
+
+
+class CDXError(Exception):
+    pass
+
+
+def remove_www_prefix(domain):
+    return domain[4:] if domain.startswith("www.") else domain
+
+
+def iter_response_text(response, chunk_size=65536):
+    # Decoded text chunks of a streamed response, counting the bytes received
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    for chunk in response.iter_content(chunk_size=chunk_size):
+        metrics.increment("cdx_bytes", len(chunk))
+        yield decoder.decode(chunk)
+    yield decoder.decode(b'', final=True)
+
+
+def iter_json_rows(chunks):
+    # Incrementally decodes the rows of a top-level JSON array from text chunks
+    decoder = json.JSONDecoder()
+    buffer = ''
+    opened = False
+    for chunk in chunks:
+        parse_start = time.perf_counter()
+        buffer += chunk
+        pos = 0
+        rows = []
+        while True:
+            while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+                pos += 1
+            if pos >= len(buffer):
+                break
+            if not opened or buffer[pos] == ']':
+                opened = True  # Opening or closing bracket of the outer array
+                pos += 1
+                continue
+            try:
+                row, pos = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                break  # Incomplete row; wait for more data
+            rows.append(row)
+        buffer = buffer[pos:]
+        metrics.observe("cdx_parse", time.perf_counter() - parse_start)
+        yield from rows
+
+
+def cdx_query_url(domain, from_timestamp=None):
+    url = f"{download.wayback_base_url}/web/timemap/?url=http://{domain}/&matchType=prefix&collapse=urlkey&output=json&fl={quote(cdx_fields, safe='')}&filter=!statuscode%3A%5B45%5D.."
+    if from_timestamp:
+        url += f"&from={from_timestamp}"
+    return url
+
+
+def stream_cdx_rows(domain, page_size=None, from_timestamp=None):
+    # Yields the header row once, then every capture row, following resume keys page by page
+    page_size = page_size or cdx_page_size
+    base_url = cdx_query_url(domain, from_timestamp) + f"&limit={page_size}&showResumeKey=true"
+    resume_key = None
+    header_sent = False
+    total_rows = 0
+    while True:
+        url = base_url + (f"&resumeKey={quote(resume_key, safe='')}" if resume_key else "")
+        response = http_get(url, stream=True)
+        if response.status_code != 200:
+            response.close()
+            raise CDXError(f"Status code: {response.status_code}")
+        response.encoding = 'utf-8'
+
+        resume_key = None
+        expect_resume_key = False
+        first_row = True
+        with response:
+            for row in iter_json_rows(iter_response_text(response)):
+                if first_row:
+                    first_row = False
+                    if not header_sent:
+                        header_sent = True
+                        yield row
+                    continue  # Later pages repeat the header row
+                if expect_resume_key:
+                    resume_key = row[0] if row else None
+                    continue
+                if not row:
+                    expect_resume_key = True  # An empty row separates the captures from the resume key
+                    continue
+                total_rows += 1
+                yield row
+
+        if not resume_key:
+            if total_rows > page_size:
+                print()  # Finish the page progress line
+            return
+        print(f"\rRetrieved {total_rows} captures...", end='', flush=True)
+
+
+def fetch_cdx_num_pages(domain, from_timestamp=None):
+    response = http_get(cdx_query_url(domain, from_timestamp) + "&showNumPages=true", timeout=(download.http_timeout[0], cdx_page_timeout))
+    if response.status_code != 200:
+        raise CDXError(f"Status code: {response.status_code}")
+    try:
+        return int(response.text.strip())
+    except ValueError:
+        raise CDXError(f"Unexpected page count response: {response.text.strip()[:80]}")
+
+
+def fetch_cdx_page(domain, page, from_timestamp=None):
+    # Returns (header, rows) for one page, retrying with backoff so one bad page doesn't fail the listing
+    import requests
+    for attempt in range(cdx_page_retries):
+        try:
+            response = http_get(cdx_query_url(domain, from_timestamp) + f"&page={page}", stream=True, timeout=(download.http_timeout[0], cdx_page_timeout), retries=0)
+            if response.status_code == 200:
+                response.encoding = 'utf-8'
+                with response:
+                    rows = [row for row in iter_json_rows(iter_response_text(response)) if row]
+                return (rows[0], rows[1:]) if rows else (None, [])
+            response.close()
+            error = f"Status code: {response.status_code}"
+        except requests.exceptions.RequestException as e:
+            error = str(e)
+        if attempt + 1 < cdx_page_retries:
+            time.sleep(2 ** attempt)
+    raise CDXError(f"Page {page} failed after {cdx_page_retries} attempts ({error})")
+
+
+def stream_cdx_rows_parallel(domain, workers, from_timestamp=None):
+    # Fetches showNumPages pages concurrently; yields the header once, then rows in page order,
+    # dropping URLs already seen on earlier pages (collapse only applies within a page)
+    num_pages = fetch_cdx_num_pages(domain, from_timestamp)
+    seen_urls = set()
+    header_sent = False
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(profiled(fetch_cdx_page), domain, page, from_timestamp) for page in range(num_pages)]
+        try:
+            for page, future in enumerate(futures):
+                header, rows = future.result()
+                if header and not header_sent:
+                    header_sent = True
+                    yield header
+                for row in rows:
+                    if row[0] not in seen_urls:
+                        seen_urls.add(row[0])
+                        yield row
+                print(f"\rRetrieved {page + 1}/{num_pages} pages ({len(seen_urls)} captures)...", end='', flush=True)
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+    print()
@@ -0,0 +1,156 @@
+# Matching captures to file types by URL extension and MIME type. The mapping tables live in
+# mappings.py and are only imported when a listing is classified.
+
+import time
+from collections import defaultdict
+
+from .instrumentation import metrics
+
+
+def extract_extension_from_url(url):
+    if '?' in url:
+        url = url.split('?', 1)[0]  # Take the part before the query parameters
+    ext = url.rsplit('.', 1)[-1]
+    if ext and '/' not in ext:  # Check if it's a valid extension
+        return '.' + ext  # Ensure the dot is included
+    return None
+
+
+def analyze_extensions_for_mime_type(mime_type, file_list):
+    # logic to parse URLs and extract potential extensions
+    # Return a list of found extensions
+    pass
+
+
+def format_extension_output(mime_type, url, mapping):
+    extension = extract_extension_from_url(url)
+    if extension:
+        certainty = "DEFINITELY"
+        extension_info = extension
+    else:
+        certainty = "LIKELY" if mapping["likely"] != "Various" else "UNKNOWN"
+        extension_info = mapping["likely"]
+        if mapping["alternatives"]:
+            extension_info += " (or possibly: " + ", ".join(mapping["alternatives"]) + ")"
+    
+    return f"{mime_type:<30} {certainty:<10} {extension_info}"
+
+
+def find_mime_type(extension, strictness):
+    from .mappings import strictness_0_mime_mapping, strictness_1_mime_mapping, strictness_2_mime_mapping
+    if strictness == 0:
+        return strictness_0_mime_mapping.get(extension, ["text/plain"])
+    elif strictness == 2:
+        # Placeholder for future development
+        return strictness_2_mime_mapping.get(extension, ["text/plain"])
+    else:  # Default strictness
+        return strictness_1_mime_mapping.get(extension, ["text/plain"])
+
+
+class FileListIndex:
+    # Single pass over a capture list: row positions grouped by URL extension and by MIME type
+    def __init__(self, file_list):
+        from .cache import ColumnarFileList
+        self.file_list = file_list
+        self.by_extension = defaultdict(list)
+        self.by_mime = defaultdict(list)
+        if isinstance(file_list, ColumnarFileList):
+            # Extension and MIME columns come straight from the cache; URLs are never decoded.
+            # self.extensions holds the extension of each row, parallel to file_list[1:]
+            self.extensions = file_list.values("extension")
+            mimes = file_list.values("mimetype")
+        else:
+            self.extensions = [extract_extension_from_url(item[0]) for item in file_list[1:]]
+            mimes = [item[1] for item in file_list[1:]]
+        for position, (extension, mime) in enumerate(zip(self.extensions, mimes)):
+            self.by_extension[extension].append(position)
+            self.by_mime[mime].append(position)
+        self.extension_counts = {extension: len(rows) for extension, rows in self.by_extension.items()}
+        self.mime_counts = {mime: len(rows) for mime, rows in self.by_mime.items()}
+
+    def candidates(self, extension, mime_type):
+        # Rows whose URL has the extension or whose MIME type matches, in list order
+        positions = set(self.by_extension.get(extension, []))
+        for mime in self.by_mime:
+            if mime in mime_type:
+                positions.update(self.by_mime[mime])
+        return sorted(positions)
+
+
+file_list_index = None
+
+
+def get_file_list_index(file_list):
+    global file_list_index
+    if file_list_index is None or file_list_index.file_list is not file_list:
+        with metrics.timer("index_build"):
+            file_list_index = FileListIndex(file_list)
+    return file_list_index
+
+
+def list_file_types(file_list, domain):
+    from .mappings import mime_type_mapping
+    # Initialize dictionaries for different categories
+    definitive_results = {}
+    uncertain_results = set()
+    likely_results = {}
+
+    # Process each distinct MIME type in the file list
+    mime_counts = get_file_list_index(file_list).mime_counts
+    filter_start = time.perf_counter()
+    for mime_type in mime_counts:
+        mapping = mime_type_mapping.get(mime_type, {"definite": None, "likely": []})
+        definite_extension = mapping.get("definite")
+        likely_extensions = mapping.get("likely", [])
+
+        if definite_extension:
+            definitive_results[mime_type] = definite_extension
+        elif likely_extensions:
+            likely_results[mime_type] = likely_extensions
+        else:
+            uncertain_results.add(mime_type)
+
+    metrics.observe("filter", time.perf_counter() - filter_start, stage="list_file_types")
+    # Return the collected data without printing
+    return definitive_results, likely_results, uncertain_results, mime_counts
+
+
+def find_matching_urls(file_list, filetype, strictness):
+    # Matches are (original URL, timestamp, MIME type, payload digest or None, archived size in bytes or None).
+    # Caches written before the listing carried `length` have no sizes; --nocache fetches them.
+    from .mappings import exclusive_mime_type_mapping, strictness_1_mime_mapping
+    mime_type = find_mime_type(filetype, strictness)
+    matching_urls = []
+    digest_column = file_list[0].index("digest") if "digest" in file_list[0] else None
+    length_column = file_list[0].index("length") if "length" in file_list[0] else None
+
+    # Only rows with the extension or a matching MIME type can qualify; look them up instead of rescanning
+    index = get_file_list_index(file_list)
+    filter_start = time.perf_counter()
+    for position in index.candidates('.' + filetype, mime_type):
+        item = file_list[position + 1]
+        url, archive_number, item_mime_type = item[0], item[2], item[1]
+        digest = item[digest_column] or None if digest_column is not None else None
+        length = int(item[length_column]) or None if length_column is not None and str(item[length_column]).isdigit() else None
+        ext_in_url = index.extensions[position]
+
+        # Check for exclusive MIME type association with a different extension
+        if item_mime_type in exclusive_mime_type_mapping and exclusive_mime_type_mapping[item_mime_type] != '.' + filetype:
+            continue
+
+        if strictness in [0, 1]:
+            # Exclude if URL has a different extension, except if MIME type is a native match for level 1
+            if ext_in_url and ext_in_url != '.' + filetype:
+                if strictness == 1 and strictness_1_mime_mapping.get(filetype) != item_mime_type:
+                    continue
+                elif strictness == 0:
+                    continue  # Apply the same logic for level 0
+
+            # Include URLs ending with the filetype or MIME type matches
+            if ext_in_url == '.' + filetype or item_mime_type in mime_type:
+                matching_urls.append((url, archive_number, item_mime_type, digest, length))
+        elif strictness == 2 and ext_in_url == '.' + filetype and item_mime_type in mime_type:
+            matching_urls.append((url, archive_number, item_mime_type, digest, length))
+
+    metrics.observe("filter", time.perf_counter() - filter_start, stage="find_matching_urls")
+    return matching_urls
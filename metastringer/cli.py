@@ -0,0 +1,467 @@
+# Command line entry point: argument parsing, runtime configuration and the interactive menus
+
+import argparse
+import atexit
+import csv
+import os
+import shutil
+import sys
+import time
+
+from . import download, extract, instrumentation, results, revisions, sweep
+from .aggregate import print_metadata_report
+from .cache import fetch_file_list
+from .cdx import remove_www_prefix
+from .classify import find_matching_urls, find_mime_type, get_file_list_index, list_file_types
+from .console import blue_start, blue_end, green_start, green_end, red_start, red_end, italics_start, italics_end
+from .download import FileTooLarge, download_file
+from .extract import extract_metadata, highlight_keys
+from .instrumentation import metrics, write_profile
+from .results import get_results_store, open_result_sink, print_stored_results, result_sink_types
+from .revisions import find_revisions
+from .sweep import test_files_for_metadata, tested_extensions
+
+
+def main():
+    try:
+        args = parse_arguments()
+        configure_runtime(args)
+        start_instrumentation(args)
+        rate_limit = args.rate_limit  # Capture the rate limit value
+        strictness = args.strictness
+
+        if args.batch:
+            from .batch import run_batch  # Pulls in multiprocessing only when it is needed
+            run_batch(args)
+            return
+
+        domain = remove_www_prefix(args.domain)
+        for path in args.output:
+            open_result_sink(path)
+
+        if args.evict_results is not None:
+            removed = get_results_store().evict_older_than(args.evict_results)
+            print(f"Removed {removed} stored results older than {args.evict_results} days.")
+        if args.show_results:
+            print_stored_results(domain, args.ext or args.filetype)
+            sys.exit(0)
+        if args.metadata_report:
+            print_metadata_report(domain, args.ext or args.filetype, args.report_limit)
+            sys.exit(0)
+
+        file_list, server_response_time, unique_mime_types_count, cache_age = fetch_file_list(domain, args.nocache, args.cdx_workers, args.refresh)
+
+        if cache_age > 0:
+            print(f"\nServer response time: {server_response_time:.2f} seconds {blue_start}{italics_start}(due to {cache_age:.1f} day old cache file){italics_end}{blue_end}")
+        else:
+            print(f"\nServer response time: {server_response_time:.2f} seconds")
+        get_file_list_index(file_list)  # Build the extension/MIME index once, up front
+
+        chosen_extension = None
+        if args.ext or args.filetype:
+            chosen_extension = args.ext if args.ext else args.filetype
+
+        while True:
+            if not chosen_extension:
+                # Display MIME types count and table
+                print(f"{green_start}{unique_mime_types_count} MIME types{green_end} for target: {green_start}{domain.upper()}{green_end}\n")
+                definitive_results, likely_results, uncertain_results, mime_counts = list_file_types(file_list, domain)
+                print_results(definitive_results, likely_results, uncertain_results, domain, mime_counts)
+                chosen_extension = prompt_for_extension(file_list, domain, unique_mime_types_count)
+
+            # Process the chosen extension
+            result, matching_urls = process_filetype(file_list, chosen_extension, domain, unique_mime_types_count, strictness, args.verbosity, args.rate_limit)
+
+            if result == "no_files_found":
+                action = handle_no_files_found(chosen_extension)
+                if action == "show_mime_list":
+                    chosen_extension = None  # Reset chosen_extension to None to display MIME types again
+                    continue
+                elif action in ['q', 'quit', 'exit']:
+                    sys.exit(0)
+                else:
+                    chosen_extension = action  # Set new chosen extension
+
+            elif result == "files_found":
+                # Display the menu and handle the choice
+                test_files_for_metadata(matching_urls, chosen_extension, domain, rate_limit, portion=False, verbosity=args.verbosity, strictness=strictness,
+                                        revisions=find_revisions(file_list, matching_urls, chosen_extension, strictness))
+                new_extension = display_menu_and_handle_choice(matching_urls, chosen_extension, domain, unique_mime_types_count, file_list, strictness, args.verbosity, args.rate_limit)
+                if new_extension == 'new_extension':
+                    chosen_extension = None  # Reset for new extension input
+                elif new_extension == 'show_mime_list':
+                    chosen_extension = None  # Reset to show MIME types again
+
+            # Reset chosen_extension to None for the next iteration
+            chosen_extension = None
+
+        if args.rate_limit:
+            manage_traffic(args.rate_limit)
+
+        if download.files_downloaded:
+            remove_downloaded_files()
+    except KeyboardInterrupt:
+        sys.exit(0)
+
+
+def start_instrumentation(args):
+    # Metrics and profiles are written at exit, so every sys.exit path in the menus still reports
+    if args.metrics_file:
+        atexit.register(metrics.write, args.metrics_file)
+    if args.profile:
+        import cProfile
+        instrumentation.profiling = True
+        main_profiler = cProfile.Profile()
+        instrumentation.profilers.append(main_profiler)
+        main_profiler.enable()
+
+        def finish_profile():
+            main_profiler.disable()
+            write_profile(args.profile)
+        atexit.register(finish_profile)
+
+
+def configure_runtime(args, rate_share=1):
+    # Applies the CLI options to the module-level settings; batch workers split the rate budget
+    sweep.sweep_workers = max(1, args.workers)
+    sweep.extract_workers = max(1, args.extract_workers)
+    sweep.pipeline_depth = max(1, args.pipeline_depth)
+    extract.exiftool_pool_size = sweep.extract_workers
+    extract.extractor = args.extractor
+    download.rate_limiter = download.AdaptiveTokenBucket(args.rate_limit * rate_share, capacity=sweep.sweep_workers,
+                                                         min_rate=args.min_rate / rate_share, max_rate=args.max_rate / rate_share)
+    download.http_timeout = (download.http_timeout[0], args.timeout)
+    download.http_retries = max(0, args.retries)
+    download.max_download_bytes = int(max(0, args.max_size) * 1024 * 1024)
+    download.http_pool_size = max(download.http_pool_size, sweep.sweep_workers, args.cdx_workers)
+    sweep.reuse_results = not args.retest
+    sweep.resume_sweeps = args.resume
+    sweep.sweep_order = args.order
+    sweep.range_fetch = args.range_fetch
+    revisions.mine_revisions = args.revisions
+    revisions.revision_lookup_cap = max(0, args.max_revision_lookups)
+    sweep.sweep_byte_budget = args.max_bytes
+    sweep.sweep_time_budget = args.deadline
+    sweep.sample_target_width = args.sample_width
+    sweep.sample_confidence = args.confidence
+    sweep.sample_mode = args.sample_mode
+    sweep.max_digest_repeats = args.max_digest_repeats
+    results.sink_flush_every = max(1, args.flush_every)
+    results.sink_flush_interval = args.flush_interval
+
+
+def parse_byte_size(text):
+    # "1500", "500K", "200M" or "2G" as a number of bytes
+    units = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+    text = text.strip().upper().removesuffix("B")
+    try:
+        if text and text[-1] in units:
+            return int(float(text[:-1]) * units[text[-1]])
+        return int(float(text))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid size: {text!r}")
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(prog="metastringer", description="Script to fetch and process files from the Wayback Machine.")
+    parser.add_argument("domain", nargs='?', help="The domain to search.")
+    parser.add_argument("filetype", nargs='?', help="The filetype to process. If not specified, all file types will be listed.", default=None)
+    parser.add_argument("--ext", help="The filetype to process.", default=None)
+    parser.add_argument("--rate-limit", type=float, help="Initial time in seconds to wait between requests; adjusted automatically between --min-rate and --max-rate.", default=0.5)
+    parser.add_argument("--min-rate", type=float, default=0.2, help="Lowest download rate (requests/s) the rate controller backs off to.")
+    parser.add_argument("--max-rate", type=float, default=5.0, help="Highest download rate (requests/s) the rate controller climbs to.")
+    parser.add_argument("--workers", type=int, default=1, help="Number of concurrent downloads during metadata sweeps (all share the --rate-limit budget).")
+    parser.add_argument("--extract-workers", type=int, default=2, help="Number of ExifTool workers extracting downloaded files during full sweeps.")
+    parser.add_argument("--pipeline-depth", type=int, default=8, help="Downloaded files that may wait for extraction before downloads pause (bounds memory and temp-disk use).")
+    parser.add_argument("--extractor", choices=["auto", "native", "exiftool"], default="auto", help="Metadata extraction: built-in readers for PDF/Office/JPEG with ExifTool for other formats (auto), built-in only, or ExifTool only.")
+    parser.add_argument("--range-fetch", action='store_true', help="Read PDF and Office documents with HTTP Range requests: fetch the tail of the file and only the parts holding its metadata, downloading the whole file where the server or the file does not allow it.")
+    parser.add_argument("--max-size", type=float, default=50, help="Skip captures larger than this many MB instead of downloading them (0: no limit).")
+    parser.add_argument("--timeout", type=float, default=60, help="Seconds to wait for a server response before retrying.")
+    parser.add_argument("--retries", type=int, default=3, help="Retries for failed or throttled requests (jittered exponential backoff).")
+    parser.add_argument("--nocache", action='store_true', help="Bypass cache and fetch fresh data.")
+    parser.add_argument("--refresh", action='store_true', help="Only fetch captures newer than the cached listing and merge them in.")
+    parser.add_argument("--cdx-workers", type=int, default=0, help="Fetch the CDX listing as parallel pages using this many workers (0: sequential).")
+    parser.add_argument("--strictness", type=int, choices=[0, 1, 2], default=1, help="Set the strictness level for file type detection.")
+    parser.add_argument("--sample-width", type=float, default=0.2, help="Option 4: stop sampling once the confidence interval on the hit rate is this wide (0.2 = 20 points).")
+    parser.add_argument("--confidence", type=float, default=0.95, help="Option 4: confidence level of the sampling interval.")
+    parser.add_argument("--sample-mode", choices=["stratified", "random"], default="stratified", help="Option 4: draw the sample stratified by capture year and path prefix, or purely at random.")
+    parser.add_argument("--max-digest-repeats", type=int, default=25, help="Skip payloads shared by more captures than this (likely error pages).")
+    parser.add_argument("--order", choices=["cdx", "smallest", "yield", "sample"], default=None, help="Order of downloads in a full sweep: listing order, smallest first, best expected metadata yield per byte, or a representative random sample (default: sample when a budget is set, cdx otherwise).")
+    parser.add_argument("--max-bytes", type=parse_byte_size, default=None, help="Stop a full sweep once it has downloaded this much (e.g. 500M, 2G) and report a partial tally.")
+    parser.add_argument("--deadline", type=float, metavar="SECONDS", default=None, help="Stop a full sweep from starting new downloads after this many seconds and report a partial tally.")
+    parser.add_argument("--revisions", action='store_true', help="Full sweeps also test every other distinct payload archived for matched URLs (listing uniqcount > 1), reported per revision.")
+    parser.add_argument("--max-revision-lookups", type=int, default=50, help="CDX lookups a sweep may spend finding revisions (matched URLs in one directory share a lookup).")
+    parser.add_argument("--resume", action='store_true', help="Continue an interrupted full sweep from its checkpoint instead of starting over.")
+    parser.add_argument("--retest", action='store_true', help="Test captures again even if the results store already has them.")
+    parser.add_argument("--show-results", action='store_true', help="Print stored metadata results for the domain (and filetype, if given) and exit.")
+    parser.add_argument("--metadata-report", action='store_true', help="Print the Author, Creator and Producer values indexed for the domain (and filetype, if given) with counts, capture dates and example URLs, and exit.")
+    parser.add_argument("--report-limit", type=int, default=20, help="Values listed per field by --metadata-report (0: all).")
+    parser.add_argument("--evict-results", type=float, metavar="DAYS", default=None, help="Remove stored metadata results older than DAYS days.")
+    parser.add_argument("-v", "--verbosity", action="count", default=0, help="Increase output verbosity")
+    parser.add_argument("--metrics-file", metavar="PATH", default=None, help="Write per-stage timings and counters here when the run ends (Prometheus textfile if PATH ends in .prom, JSON otherwise).")
+    parser.add_argument("--profile", metavar="PATH", nargs='?', const="metastringer.prof", default=None, help="Run under cProfile (including worker-thread hot paths) and write pstats output to PATH.")
+    parser.add_argument("--batch", metavar="FILE", help="Run headless over a file of domains (one per line, optionally followed by extensions).")
+    parser.add_argument("--batch-workers", type=int, default=4, help="Number of domains processed in parallel in batch mode.")
+    parser.add_argument("--host-concurrency", type=int, default=8, help="Maximum concurrent requests to web.archive.org across all batch workers.")
+    parser.add_argument("--domain-timeout", type=float, default=None, help="Seconds after which a batch domain stops testing new files and reports a partial tally.")
+    parser.add_argument("--output-dir", default="./batch_results", help="Directory for per-domain batch results (JSON) and logs.")
+    parser.add_argument("--output", metavar="FILE", action="append", default=[], help="Append every tested capture and its metadata to FILE while the sweep runs (.csv, .jsonl, .sqlite or .db; repeatable).")
+    parser.add_argument("--flush-every", type=int, default=50, help="Records buffered before --output files are written.")
+    parser.add_argument("--flush-interval", type=float, default=5.0, help="Seconds after which buffered --output records are written regardless.")
+    args = parser.parse_args()
+    if not args.domain and not args.batch:
+        parser.error("a domain is required unless --batch is given")
+    if args.batch and args.profile:
+        parser.error("--profile cannot be combined with --batch (domains run in worker processes the profile would not cover)")
+    for path in args.output:
+        if os.path.splitext(path)[1].lower() not in result_sink_types:
+            parser.error(f"--output {path}: expected a .csv, .jsonl, .sqlite or .db file")
+    return args
+
+
+def prompt_for_extension(file_list, domain, unique_mime_types_count):
+    while True:
+        print("Enter an extension to retrieve (e.g., 'pdf'), or type 'exit' to quit:\n")
+        chosen_extension = input().lower()
+
+        if chosen_extension in ['q', 'quit', 'exit']:
+            sys.exit(0)
+        elif chosen_extension.strip() == "":
+            print("Invalid input. Please enter a valid extension or type 'exit' to quit.")
+        else:
+            return chosen_extension
+
+
+def process_extension(file_list, domain, unique_mime_types_count, strictness, chosen_extension, verbosity, rate_limit):
+    result, matching_urls = process_filetype(file_list, chosen_extension, domain, unique_mime_types_count, strictness, verbosity, rate_limit)
+
+    if result == "no_files_found":
+        action = handle_no_files_found(chosen_extension)
+        if action == "show_mime_list":
+            return "show_mime_list"  # Pass this flag back up to the caller
+        elif action in ['q', 'quit', 'exit']:
+            sys.exit(0)
+        return None if action == "list_mime_types" else action
+    elif result == "files_found":
+        new_extension = display_menu_and_handle_choice(matching_urls, chosen_extension, domain, unique_mime_types_count, file_list, strictness, verbosity, rate_limit)
+        if new_extension == 'return_to_extension_selection':
+            return None
+        elif new_extension:
+            return new_extension
+    return None
+
+
+def print_results(definitive_results, likely_results, uncertain_results, domain, mime_counts=None):
+    from .mappings import highlight_types
+    mime_counts = mime_counts or {}
+
+    header_length = max(len(domain) + len("MIME types for target: "), 70)
+    print("-" * header_length)
+    print(f"{'MIME Type':<30} {'Certainty':<15} {'Count':>8}  {'Extension(s)':<15}")
+    print("-" * header_length)
+
+    # Print definitive results
+    for mime_type, extension in sorted(definitive_results.items()):
+        count = mime_counts.get(mime_type, '')
+        if mime_type in highlight_types:
+            # Apply red color only to 'MIME Type' and 'Extension(s)'
+            print(f"{red_start}{mime_type:<30}{red_end} {'DEFINITE':<15} {count:>8}  {red_start}{extension:<15}{red_end}")
+        else:
+            # No color
+            print(f"{blue_start}{mime_type:<30}{blue_end} {'DEFINITE':<15} {count:>8}  {extension:<15}")
+
+    # Print likely results
+    for mime_type, extensions in sorted(likely_results.items()):
+        ext_text = ', '.join(extensions)
+        print(f"{blue_start}{mime_type:<30}{blue_end} {'LIKELY':<15} {mime_counts.get(mime_type, ''):>8}  {ext_text:<15}")
+
+    # Print uncertain results
+    for mime_type in sorted(uncertain_results):
+        print(f"{blue_start}{mime_type:<30}{blue_end} {'UNCERTAIN':<15} {mime_counts.get(mime_type, ''):>8}")
+
+    # Print a final line to end the section
+    print("-" * header_length)
+
+
+def process_filetype(file_list, filetype, domain, unique_mime_types_count, strictness, verbosity, rate_limit):
+    if not filetype:
+        filetype = "unknown"  # Default value or handle it appropriately
+
+    mime_type = find_mime_type(filetype, strictness)
+    matching_urls = find_matching_urls(file_list, filetype, strictness)
+
+    if len(matching_urls) == 0:
+        return "no_files_found", None
+
+    print(f"\nFound {green_start}{len(matching_urls)}{green_end} files with the extension {green_start}'{filetype}'{green_end} and MIME type '{mime_type}'.")
+    display_menu_and_handle_choice(matching_urls, filetype, domain, unique_mime_types_count, file_list, strictness, verbosity, rate_limit)
+
+    return "files_found", matching_urls
+
+
+def handle_no_files_found(filetype):
+    print(f"\n{italics_start}{red_start}No files found{red_end} with the extension {red_start}'{filetype}'{red_end}.{italics_end}")
+    print("Enter a different extension, or:")
+    print("1: See a list of all discovered MIME types and extensions")
+    print("2: Quit")
+    choice = input("\n").lower()
+
+    if choice == '1':
+        return "show_mime_list"  # Return a flag indicating to show MIME list
+    elif choice in ['2', 'q', 'quit', 'exit']:
+        sys.exit(0)
+    else:
+        return choice
+
+
+def display_menu_and_handle_choice(matching_urls, filetype, domain, unique_mime_types_count, file_list, strictness, verbosity, rate_limit):
+    while True:
+        print("\nSelect an option:")
+        print("1: Print the list of URLs")
+        print("2: Save the list to a file")
+        print("3: Choose a different extension")
+        print("4: Test a sample of the files for metadata (estimate the hit rate)")
+        if filetype in tested_extensions:
+            print(f"5: {green_start}[COMPLETED]{green_end} Test all files for metadata")
+        else:
+            print("5: Test all files for metadata")
+        print("6: Quit")
+        choice = input("\n").lower()
+
+        if choice in ['1', 'p']:
+            print_urls([url for url, _, _, _, _ in matching_urls])
+            download_prompt(matching_urls)
+        elif choice in ['2', 's']:
+            save_to_csv(matching_urls, filetype, domain)
+        elif choice == '3':
+            new_extension = prompt_for_extension(file_list, domain, unique_mime_types_count)
+            if new_extension:
+                return process_extension(file_list, domain, unique_mime_types_count, strictness, new_extension, verbosity, rate_limit)
+            else:
+                return 'return_to_extension_selection'
+        elif choice == '4':
+            test_files_for_metadata(matching_urls, filetype, domain, rate_limit, portion=True, verbosity=verbosity)
+        elif choice == '5':
+            test_files_for_metadata(matching_urls, filetype, domain, rate_limit, portion=False, verbosity=verbosity, strictness=strictness,
+                                    revisions=find_revisions(file_list, matching_urls, filetype, strictness))
+        elif choice in ['6', 'q', 'quit', 'exit']:
+            sys.exit(0)
+        else:
+            print("Invalid choice. Please enter a valid option.")
+    return None  # Return None or a default value if no new extension is chosen
+
+
+def save_to_csv(matching_urls, filetype, domain):
+    filename = f"archived_{filetype}_{domain}.csv"
+    if os.path.exists(filename):
+        print(f"File '{filename}' already exists.")
+        print("Select an option:")
+        print("1: Overwrite the file")
+        print("2: Rename and save the file")
+        print("3: Cancel")
+        save_choice = input("\nEnter your choice (1-3): ")
+        if save_choice == '2':
+            new_filename = input("Enter the new filename: ")
+            filename = new_filename if new_filename.endswith('.csv') else new_filename + '.csv'
+        elif save_choice == '3' or save_choice.lower() == 'q':
+            return
+
+    with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
+        csvwriter = csv.writer(csvfile)
+        csvwriter.writerow(['MIME Type', 'Original URL', 'Archived Download URL'])
+        for original_url, archive_number, mime_type, _, _ in matching_urls:
+            download_url = f"{download.wayback_base_url}/web/{archive_number}/{original_url}"
+            csvwriter.writerow([mime_type, original_url, download_url])
+
+    print(f"File saved as {filename}")
+
+
+def download_prompt(matching_urls):
+    while True:
+        print("\nEnter a URL to retrieve a file, [r]eturn to the previous menu, or [q]uit:")
+        selected_url = input().strip()  # Removed the .lower() method
+
+        if selected_url == 'r':
+            return
+        elif selected_url == 'q':
+            sys.exit(0)
+        elif any(selected_url == url for url, _, _, _, _ in matching_urls):
+            retrieve_file(selected_url, matching_urls)
+        else:
+            print("URL not found in the list. Please enter a valid URL.")
+
+
+def retrieve_file(selected_url, matching_urls):
+    archive_number = next((archive_number for url, archive_number, _, _, _ in matching_urls if url == selected_url), None)
+    if archive_number:
+        download_url = f"{download.wayback_base_url}/web/{archive_number}/{selected_url}"
+        print(f"\nAttempting to download from: {download_url}")
+        try:
+            file_path = download_file(download_url)
+        except FileTooLarge as e:
+            print(f"\nSkipped: the file is {e}. Use --max-size to raise the limit (0 for none).")
+            return
+        if file_path:
+            metadata = extract_metadata(file_path, all_tags=True)
+            print_extracted_metadata(metadata)
+            ask_remove_downloaded_files(file_path)
+    else:
+        print("\nArchive number not found for the selected URL.")
+
+
+def print_extracted_metadata(metadata):
+    if metadata:
+        print("\033[4mExtracted Metadata:\033[0m")
+        for key, value in metadata.items():
+            if key in highlight_keys:
+                print(f"{key}: \033[92m{value}\033[0m")  # Highlighted
+            else:
+                print(f"{key}: {value}")
+    else:
+        print("No metadata found or extractable for this file.")
+
+
+def ask_remove_downloaded_files(retrieved_file_path):
+    directory = os.path.dirname(retrieved_file_path)
+    all_files = os.listdir(directory)
+
+    # Ask to remove the current file
+    print(f"\nDo you wish to {red_start}remove the retrieved file?{red_end} [y/N]")
+    choice = input().lower()
+    if choice == 'y':
+        os.remove(retrieved_file_path)
+        print("Retrieved file removed.")
+        all_files.remove(os.path.basename(retrieved_file_path))  # Remove the file from the list
+
+        # If there are more files, ask to remove them. If not, remove the directory.
+        if len(all_files) > 0:
+            print(f"\nThere are {len(all_files)} additional file(s) in the temporary directory.")
+            print("Do you want to remove all these files? [y/N]")
+            all_files_choice = input().lower()
+            if all_files_choice == 'y':
+                shutil.rmtree(directory, ignore_errors=True)
+                print("All files in the temporary directory removed.")
+            else:
+                print("Additional files retained.")
+        else:
+            shutil.rmtree(directory, ignore_errors=True)  # Remove the directory as it's now empty
+            print("Temporary directory removed.")
+    else:
+        print("No files removed.")
+
+
+def print_urls(matching_urls):
+    for url in matching_urls:
+        print(url)
+
+
+def manage_traffic(rate_limit):
+    time.sleep(rate_limit)
+
+
+def remove_downloaded_files():
+    print(f"\nDo you wish to {red_start}remove the retrieved files?{red_end} [y/N]")
+    choice = input().lower()
+    if choice == 'y':
+        shutil.rmtree(download.temp_directory, ignore_errors=True)
+        print("Retrieved files and directory removed.")
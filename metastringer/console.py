@@ -0,0 +1,10 @@
+# ANSI color codes shared by all console output
+green_start = "\033[92m"
+green_end = "\033[0m"
+blue_start = "\033[94m"
+blue_end = "\033[0m"
+red_start = "\033[91m"
+red_end = "\033[0m"
+
+italics_start = "\033[3m"
+italics_end = "\033[0m"
@@ -0,0 +1,382 @@
+# HTTP client (pooled session, retries, adaptive rate limiting) and archived file downloads.
+# requests is imported on first use, so runs answered from the cache never load it.
+
+import bisect
+import os
+import random
+import threading
+import time
+from contextlib import nullcontext
+from urllib.parse import urlparse
+
+from .console import blue_start, blue_end, red_start, red_end, italics_start, italics_end
+from .instrumentation import metrics
+
+
+# Root of the Wayback Machine; the benchmark suite points this at a local stand-in server
+wayback_base_url = "https://web.archive.org"
+
+# Shared HTTP client: one pooled keep-alive session for every request the tool makes
+http_timeout = (10, 60)  # (connect, read) seconds
+http_retries = 3
+http_backoff = 1.0  # Base delay in seconds; doubles per attempt, with full jitter
+http_backoff_cap = 60.0
+http_pool_size = 10
+http_retry_statuses = {429, 500, 502, 503, 504}
+http_throttle_statuses = {429, 503}
+http_session = None
+http_session_lock = threading.Lock()
+# Optional per-host semaphores limiting concurrent requests, shared across batch worker processes
+host_semaphores = {}
+
+
+def get_http_session():
+    global http_session
+    import requests
+    with http_session_lock:
+        if http_session is None:
+            http_session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=http_pool_size)
+            http_session.mount("https://", adapter)
+            http_session.mount("http://", adapter)
+            http_session.headers.update({"Accept-Encoding": "gzip, deflate", "User-Agent": "metastringer"})
+        return http_session
+
+
+def backoff_delay(attempt, retry_after=None):
+    if retry_after and retry_after.isdigit():
+        return min(http_backoff_cap, float(retry_after))
+    return random.uniform(0, min(http_backoff_cap, http_backoff * 2 ** attempt))
+
+
+def http_get(url, stream=False, timeout=None, retries=None, limiter=None, **kwargs):
+    # GET through the pooled session, retrying connection errors, timeouts and transient statuses.
+    # The last response (or exception) is handed back once the retries are used up.
+    import requests
+    retries = http_retries if retries is None else retries
+    for attempt in range(retries + 1):
+        if limiter:
+            limiter.acquire()
+        retry_after = None
+        kind = "cdx" if "/web/timemap" in url else "download"
+        try:
+            with host_semaphores.get(urlparse(url).hostname) or nullcontext(), metrics.timer("http_request", kind=kind):
+                response = get_http_session().get(url, stream=stream, timeout=timeout or http_timeout, **kwargs)
+            metrics.increment("http_requests", kind=kind, status=response.status_code)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            metrics.increment("http_requests", kind=kind, status=type(e).__name__)
+            if limiter and isinstance(e, requests.exceptions.ConnectionError):
+                limiter.record_throttle()  # Connection resets are how the archive sheds load
+            if attempt == retries:
+                raise
+        else:
+            if limiter:
+                if response.status_code in http_throttle_statuses:
+                    limiter.record_throttle()
+                elif response.status_code < 500:
+                    limiter.record_success()
+            if response.status_code not in http_retry_statuses or attempt == retries:
+                return response
+            retry_after = response.headers.get("Retry-After")
+            response.close()
+        delay = backoff_delay(attempt, retry_after)
+        metrics.observe("retry_backoff", delay, kind=kind)
+        time.sleep(delay)
+
+
+class TokenBucket:
+    # Shared limiter: one token per request, refilled at 1/interval tokens per second
+    def __init__(self, interval, capacity=1):
+        self.interval = interval
+        self.capacity = max(1, capacity)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        if self.interval > 0:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) / self.interval)
+        else:
+            self.tokens = self.capacity
+        self.updated = now
+
+    @property
+    def rate(self):
+        return 1 / self.interval if self.interval > 0 else float('inf')
+
+    def record_success(self):
+        pass
+
+    def record_throttle(self):
+        pass
+
+    def set_interval(self, interval):
+        with self.lock:
+            self._refill(time.monotonic())
+            self.interval = interval
+
+    def pause(self, seconds):
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.tokens = 0
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                if now >= self.paused_until:
+                    self._refill(now)
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) * self.interval
+                else:
+                    self.updated = now
+                    wait = self.paused_until - now
+            metrics.observe("rate_limit_wait", wait)
+            time.sleep(wait)
+
+
+class AdaptiveTokenBucket(TokenBucket):
+    # AIMD control: the rate climbs by roughly `increase` requests/s per second of successful requests
+    # and is multiplied by `decrease` on throttling, always staying within [min_rate, max_rate]
+    def __init__(self, interval, capacity=1, min_rate=0.2, max_rate=5.0, increase=0.1, decrease=0.5):
+        self.min_rate = max(min_rate, 0.001)
+        self.max_rate = max(max_rate, self.min_rate)
+        self.increase = increase
+        self.decrease = decrease
+        self.last_decrease = 0.0
+        start_rate = 1 / interval if interval > 0 else self.max_rate
+        super().__init__(1 / self.clamp(start_rate), capacity)
+
+    def clamp(self, rate):
+        return min(self.max_rate, max(self.min_rate, rate))
+
+    def record_success(self):
+        with self.lock:
+            rate = 1 / self.interval
+            self._refill(time.monotonic())
+            self.interval = 1 / self.clamp(rate + self.increase / rate)
+
+    def record_throttle(self):
+        with self.lock:
+            now = time.monotonic()
+            # Requests already in flight report the same overload; cut the rate once per interval
+            if now - self.last_decrease < max(1.0, self.interval):
+                return
+            self.last_decrease = now
+            self._refill(now)
+            self.interval = 1 / self.clamp(self.rate * self.decrease)
+
+
+# Global limiter shared by every download; replaced in main() from --rate-limit/--workers/--min-rate/--max-rate
+rate_limiter = AdaptiveTokenBucket(0.5)
+
+
+files_downloaded = False
+# Largest file a download may write; larger captures are skipped (0: no limit)
+max_download_bytes = 50 * 1024 * 1024
+download_chunk_size = 65536
+# Downloads are saved here; sweep workers use per-thread subdirectories named <pid>-<thread id>
+temp_directory = "./temp_metadata"
+
+
+class FileTooLarge(Exception):
+    pass
+
+
+def remove_worker_directories():
+    # Removes this process's per-thread download directories once a sweep is over, and the download
+    # directory itself if nothing else is left in it (only empty directories, so no file is touched)
+    prefix = f"{os.getpid()}-"
+    if not os.path.isdir(temp_directory):
+        return
+    for name in os.listdir(temp_directory):
+        if name.startswith(prefix):
+            try:
+                os.rmdir(os.path.join(temp_directory, name))
+            except OSError:
+                pass
+    try:
+        os.rmdir(temp_directory)
+    except OSError:
+        pass
+
+
+def download_file(url, bulk_operation=False, rate_limit=0.5, filetype=None, verbosity=0):
+    # Streams the capture to disk in chunks, so memory use does not grow with the file size.
+    # Raises FileTooLarge, before the body is fetched when Content-Length gives the size away.
+    global files_downloaded
+    import requests
+    directory = temp_directory
+    if bulk_operation:
+        # Concurrent workers (threads and batch processes) may fetch files sharing a basename;
+        # each gets its own subdirectory so the original file name is preserved
+        directory = os.path.join(directory, f"{os.getpid()}-{threading.get_ident()}")
+    os.makedirs(directory, exist_ok=True)
+
+    file_name = os.path.basename(url.split('?')[0])
+    if not file_name or '.' not in file_name:  # Assign default filename if invalid
+        file_name = f"missing-name{filetype if filetype else '.bin'}"
+        counter = 1
+        while os.path.exists(os.path.join(directory, file_name)):
+            file_name = f"missing-name{counter}{filetype if filetype else '.bin'}"
+            counter += 1
+
+    save_path = os.path.join(directory, file_name)
+
+    try:
+        # Every attempt (including retries) waits for a token from the shared rate limiter
+        with metrics.timer("download"):
+            response = http_get(url, stream=True, limiter=rate_limiter)
+            with response:
+                if response.status_code != 200:
+                    if not bulk_operation:
+                        print(f"\nFailed to download file. Status code: {response.status_code}")
+                    if verbosity > 0:
+                        print("  [-] File not retrieved successfully")
+                    return None
+                declared = response.headers.get("Content-Length", "")
+                if max_download_bytes and declared.isdigit() and int(declared) > max_download_bytes:
+                    metrics.increment("downloads_skipped", reason="too_large")
+                    raise FileTooLarge(f"{declared} bytes, over the {max_download_bytes / 1048576:g} MB limit")
+                written = 0
+                disk_time = 0.0
+                try:
+                    with open(save_path, 'wb') as file:
+                        for chunk in response.iter_content(chunk_size=download_chunk_size):
+                            written += len(chunk)
+                            metrics.increment("download_bytes", len(chunk))
+                            if max_download_bytes and written > max_download_bytes:
+                                # No (or a wrong) Content-Length: stop as soon as the limit is passed
+                                metrics.increment("downloads_skipped", reason="too_large")
+                                raise FileTooLarge(f"over the {max_download_bytes / 1048576:g} MB limit (stopped after {written} bytes)")
+                            write_start = time.perf_counter()
+                            file.write(chunk)
+                            disk_time += time.perf_counter() - write_start
+                except BaseException:
+                    os.remove(save_path)
+                    raise
+                metrics.observe("disk_write", disk_time)
+        if not bulk_operation:
+            print(f"\nFile saved to {save_path}\n")
+        files_downloaded = True
+        return save_path
+    except (requests.exceptions.Timeout, requests.exceptions.ChunkedEncodingError):
+        if not bulk_operation:
+            print("\nFailed to download file. The request timed out or the transfer was cut off.")
+        if verbosity > 0:
+            print("  [-] File not retrieved successfully")
+        return None
+    except requests.exceptions.ConnectionError:
+        # Retries are used up and the server keeps refusing us: cut the rate and hold the limiter (not this
+        # worker) for the jittered backoff of one more attempt, so every worker waits without a fixed stall
+        rate_limiter.record_throttle()
+        delay = backoff_delay(http_retries + 1)
+        metrics.observe("retry_backoff", delay, kind="download")
+        rate_limiter.pause(delay)
+        print(f"\n{red_start}{italics_start}Server has refused the current request due to rate limiting.{italics_end}{red_end}")
+        print(f"{italics_start}{blue_start}Pausing for {delay:.1f} seconds{blue_end}{italics_end}; continuing at {blue_start}{rate_limiter.rate:.2f} requests/s{blue_end}.")
+        return None
+
+
+# Range-request reads (--range-fetch): the first request takes the tail of the file, later reads
+# fetch at least range_read_size bytes around what a reader asks for
+range_tail_size = 32768
+range_read_size = 16384
+# Captures with a CDX length below this are downloaded whole: a full download is one request, where the
+# tail and the reads it leads to may take two or three for little saving
+range_min_length = 4 * range_tail_size
+# A capture whose server ignores Range is downloaded in full on its own; only after this many such
+# captures in a row from one host does range fetching stop for that host
+range_failure_limit = 5
+range_failures = {}  # Host -> captures in a row answered without Range support
+range_lock = threading.Lock()
+
+
+class RangesNotSupported(Exception):
+    pass
+
+
+class RangeReader:
+    # Random-access reader (size, read) over an archived file, fetching only the byte ranges asked
+    # for; fetched ranges are kept, so each byte crosses the network once
+    def __init__(self, url):
+        self.url = url
+        self.bytes_fetched = 0
+        self.requests = 0
+        self.starts = []  # Sorted start offsets of the fetched segments
+        self.segments = {}  # Start offset -> bytes
+        self.host = urlparse(url).hostname
+        if range_failures.get(self.host, 0) >= range_failure_limit:
+            raise RangesNotSupported("host ignores Range requests")
+        self.size = None
+        self.fetch(f"-{range_tail_size}")
+
+    def fetch(self, spec):
+        # Fetches "start-end" (or "-suffix") and stores it as a segment; raises RangesNotSupported
+        # unless the server answers with just that range
+        import requests
+        self.requests += 1
+        try:
+            # Identity encoding, so offsets refer to the file and not to a compressed transfer
+            response = http_get(self.url, stream=True, limiter=rate_limiter, headers={"Range": f"bytes={spec}", "Accept-Encoding": "identity"})
+        except requests.exceptions.RequestException as e:
+            raise RangesNotSupported(f"request failed ({e})")
+        with response:
+            content_range = response.headers.get("Content-Range", "")
+            declared = response.headers.get("Content-Length", "")
+            if response.status_code == 200 and self.size is None and declared.isdigit() and int(declared) <= range_tail_size:
+                # A file no larger than the tail may come back whole
+                data = response.content
+                start, end, total = 0, len(data) - 1, len(data)
+            elif response.status_code == 200:
+                record_range_support(self.host, False)
+                raise RangesNotSupported("server ignored the Range header")
+            elif response.status_code != 206 or not content_range.startswith("bytes ") or content_range.endswith("/*"):
+                raise RangesNotSupported(f"status {response.status_code}")
+            else:
+                span, _, total = content_range[len("bytes "):].partition("/")
+                start, end = (int(value) for value in span.split("-"))
+                data = response.content
+                record_range_support(self.host, True)
+        if len(data) != end - start + 1:
+            raise RangesNotSupported("short range response")
+        metrics.increment("range_requests")
+        metrics.increment("download_bytes", len(data))
+        self.bytes_fetched += len(data)
+        self.size = int(total)
+        bisect.insort(self.starts, start)
+        self.segments[start] = data
+        return start, end
+
+    def read(self, offset, length):
+        offset, end = max(0, offset), min(self.size, offset + max(0, length))
+        output = []
+        while offset < end:
+            position = bisect.bisect_right(self.starts, offset)
+            segment_start = self.starts[position - 1] if position else None
+            if segment_start is not None and offset < segment_start + len(self.segments[segment_start]):
+                piece = self.segments[segment_start][offset - segment_start:end - segment_start]
+                output.append(piece)
+                offset += len(piece)
+                continue
+            # A gap: fetch up to the next fetched segment, at least range_read_size bytes where possible
+            following = self.starts[position] if position < len(self.starts) else self.size
+            start, stop = self.fetch(f"{offset}-{min(following, max(end, offset + range_read_size)) - 1}")
+            if not start <= offset <= stop:
+                raise RangesNotSupported("range response does not cover the request")
+        return b"".join(output)
+
+
+def record_range_support(host, supported):
+    with range_lock:
+        if supported:
+            range_failures.pop(host, None)
+            return
+        range_failures[host] = range_failures.get(host, 0) + 1
+        disabled = range_failures[host] == range_failure_limit
+    if disabled:
+        metrics.increment("range_fetch_disabled")
+        print(f"{red_start}{host} ignored Range requests for {range_failure_limit} captures in a row; its documents are downloaded in full from now on.{red_end}")
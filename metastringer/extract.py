@@ -0,0 +1,226 @@
+# Metadata extraction: the built-in readers in native.py for the formats sweeps target, and a pool
+# of resident ExifTool processes for everything else
+
+import atexit
+import json
+import os
+import queue
+import re
+import shutil
+import subprocess
+import threading
+import time
+from functools import lru_cache
+
+from .console import blue_start, blue_end, red_start, red_end, italics_start, italics_end
+from .instrumentation import metrics
+from .download import RangeReader, RangesNotSupported
+from .native import extract_native, native_errors, read_metadata
+
+
+# Used to highlight metadata of interest in metadata output (single record search only)
+highlight_keys = ['File Name', 'Author', 'Creator', 'Producer']
+# ExifTool tag names requested during sweeps; process_metadata maps them back to highlight_keys
+exiftool_tags = ['FileName', 'Author', 'Creator', 'Producer', 'Error']
+# --extractor: "auto" reads PDF, OOXML, OLE and JPEG files natively and hands other formats (and
+# single-file views, which show every tag) to ExifTool; "native" never runs ExifTool; "exiftool" always does
+extractor = "auto"
+
+
+class ExifToolProcess:
+    # One resident "exiftool -stay_open True -@ -" process; arguments are fed one per line
+    def __init__(self):
+        self.process = subprocess.Popen(['exiftool', '-stay_open', 'True', '-@', '-'],
+                                        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                        text=True, encoding='utf-8', errors='replace')
+
+    def execute(self, *args):
+        self.process.stdin.write('\n'.join(args) + '\n-execute\n')
+        self.process.stdin.flush()
+        output = []
+        while True:
+            line = self.process.stdout.readline()
+            if not line:
+                raise OSError("ExifTool process exited unexpectedly")
+            if line.rstrip() == '{ready}':
+                return ''.join(output)
+            output.append(line)
+
+    def close(self):
+        try:
+            self.process.stdin.write('-stay_open\nFalse\n')
+            self.process.stdin.flush()
+            self.process.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            self.process.kill()
+
+
+class ExifToolPool:
+    # Hands out resident ExifTool processes to worker threads, starting them on demand up to size
+    def __init__(self, size):
+        self.size = max(1, size)
+        self.idle = queue.Queue()
+        self.started = 0
+        self.lock = threading.Lock()
+        self.processes = []
+
+    def acquire(self):
+        with self.lock:
+            if self.idle.empty() and self.started < self.size:
+                self.started += 1
+                process = ExifToolProcess()
+                self.processes.append(process)
+                return process
+        return self.idle.get()
+
+    def release(self, process):
+        self.idle.put(process)
+
+    def discard(self, process):
+        with self.lock:
+            self.started -= 1
+            self.processes.remove(process)
+        process.close()
+
+    def extract(self, file_path, tags=None):
+        args = ['-j'] + [f'-{tag}' for tag in tags or []] + [file_path]
+        for attempt in range(2):
+            process = self.acquire()
+            try:
+                output = process.execute(*args)
+            except OSError:
+                self.discard(process)  # Process died; start a fresh one and retry once
+                if attempt:
+                    raise
+                continue
+            self.release(process)
+            return output
+
+    def close(self):
+        with self.lock:
+            for process in self.processes:
+                process.close()
+            self.processes = []
+            self.started = 0
+            self.idle = queue.Queue()
+
+
+# Resident processes are started on demand, up to one per sweep worker
+exiftool_pool_size = 1
+exiftool_pool = None
+exiftool_pool_lock = threading.Lock()
+
+
+def get_exiftool_pool():
+    global exiftool_pool
+    with exiftool_pool_lock:
+        if exiftool_pool is None:
+            exiftool_pool = ExifToolPool(exiftool_pool_size)
+            atexit.register(exiftool_pool.close)
+        return exiftool_pool
+
+
+@lru_cache(maxsize=None)
+def exiftool_exists():
+    return shutil.which("exiftool") is not None
+
+
+def extract_metadata(file_path, all_tags=False):
+    if extractor == "native" or (extractor == "auto" and not (all_tags and exiftool_exists())):
+        with metrics.timer("extract", engine="native"):
+            metadata = extract_native(file_path)
+        if metadata is not None:
+            return metadata if all_tags else requested_keys(metadata)
+        metrics.increment("native_unsupported")
+        if extractor == "native":
+            return {}
+
+    if not exiftool_exists():
+        return {}  # ExifTool not found, return empty metadata
+
+    try:
+        with metrics.timer("extract", engine="exiftool"):
+            output = get_exiftool_pool().extract(file_path, None if all_tags else exiftool_tags)
+        metadata = process_metadata(output)
+        if "Error" in metadata:
+            if metadata["Error"] != "File is empty":
+                print(f"{red_start}ExifTool error for {file_path}: {metadata['Error']}{red_end}")
+            return {}
+        return metadata
+    except Exception as e:
+        print(f"Error running ExifTool: {e}")
+        return {}
+
+
+def extract_remote_metadata(url, file_name):
+    # Reads an archived document's metadata through HTTP Range requests (--range-fetch), fetching only
+    # the tail and the structures it leads to. Returns (metadata, bytes fetched); metadata is None when
+    # the server or the file does not allow it, and the caller downloads the whole file instead.
+    import requests
+    if extractor == "exiftool":
+        return None, 0
+    reader = None
+    try:
+        with metrics.timer("range_fetch"):
+            reader = RangeReader(url)
+            metadata = read_metadata(reader, file_name)
+    except (RangesNotSupported, requests.exceptions.RequestException) + native_errors:
+        # No Range support, a failed request, or a file the built-in readers cannot handle from ranges
+        metadata = None
+    if metadata is None:
+        metrics.increment("range_fetches", outcome="fallback")
+        return None, reader.bytes_fetched if reader else 0
+    metrics.increment("range_fetches", outcome="metadata")
+    return requested_keys(metadata), reader.bytes_fetched
+
+
+def requested_keys(metadata):
+    # Native results limited to the tags a sweep asks ExifTool for
+    wanted = {exiftool_tag_to_key(tag) for tag in exiftool_tags}
+    return {key: value for key, value in metadata.items() if key in wanted}
+
+
+def exiftool_tag_to_key(tag):
+    # "FileName" -> "File Name", matching ExifTool's human-readable descriptions
+    return re.sub(r'(?<=[a-z0-9])(?=[A-Z])', ' ', tag)
+
+
+def process_metadata(metadata):
+    try:
+        records = json.loads(metadata) if metadata.strip() else []
+    except json.JSONDecodeError:
+        return {}
+    if not records:
+        return {}
+
+    metadata_dict = {}
+    for tag, value in records[0].items():
+        if tag in ('SourceFile', 'Directory'):
+            continue
+        if isinstance(value, list):
+            value = ', '.join(str(item) for item in value)
+        metadata_dict[exiftool_tag_to_key(tag)] = str(value).strip()
+    return metadata_dict
+
+
+def print_basic_metadata(file_path, show_instructions=True):
+    try:
+        file_stats = os.stat(file_path)
+        file_name = os.path.basename(file_path)
+        metadata = {
+            "File Name": file_name,
+            "File Size": f"{file_stats.st_size} bytes",
+            "Last Modified": time.ctime(file_stats.st_mtime),
+            "Created": time.ctime(file_stats.st_ctime)
+        }
+        return metadata
+    except Exception as e:
+        print(f"Error extracting basic metadata: {e}")
+        return {}
+
+
+def print_exiftool_notice():
+    if not exiftool_exists() and extractor != "native":
+        print(f"{blue_start}ExifTool was not found; PDF, Office and JPEG files are read by the built-in extractors. Other formats need ExifTool.{blue_end}")
+        print(f"{italics_start}{blue_start} Install ExifTool on Linux: sudo apt-get install exiftool{blue_end}{italics_end}")
+        print(f"{italics_start}{blue_start} Install ExifTool on Windows: Download from https://exiftool.org/{blue_end}{italics_end}\n")
@@ -0,0 +1,190 @@
+# Run-wide counters and timers (--metrics-file) and cProfile support (--profile)
+
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+
+class Metrics:
+    # Thread-safe counters and timing histograms for the run, exported as JSON or Prometheus text
+    buckets = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.started = time.time()
+            self.counters = {}
+            self.timers = {}
+            self.gauges = {}
+
+    def increment(self, name, amount=1, **labels):
+        key = (name, tuple(sorted((label, str(value)) for label, value in labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def gauge(self, name, value, **labels):
+        # Last and peak value of a level, such as a queue depth
+        key = (name, tuple(sorted((label, str(value)) for label, value in labels.items())))
+        with self.lock:
+            gauge = self.gauges.get(key)
+            if gauge is None:
+                gauge = self.gauges[key] = {"value": value, "max": value}
+            gauge["value"] = value
+            gauge["max"] = max(gauge["max"], value)
+
+    def observe(self, name, seconds, **labels):
+        key = (name, tuple(sorted((label, str(value)) for label, value in labels.items())))
+        with self.lock:
+            timer = self.timers.get(key)
+            if timer is None:
+                timer = self.timers[key] = {"count": 0, "sum": 0.0, "min": seconds, "max": seconds, "buckets": [0] * len(self.buckets)}
+            timer["count"] += 1
+            timer["sum"] += seconds
+            timer["min"] = min(timer["min"], seconds)
+            timer["max"] = max(timer["max"], seconds)
+            for position, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    timer["buckets"][position] += 1
+                    break
+
+    @contextmanager
+    def timer(self, name, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "wall_seconds": round(time.time() - self.started, 3),
+                "counters": [{"name": name, "labels": dict(labels), "value": value}
+                             for (name, labels), value in sorted(self.counters.items())],
+                "timers": [{"name": name, "labels": dict(labels), "count": timer["count"], "sum_seconds": round(timer["sum"], 6),
+                            "min_seconds": round(timer["min"], 6), "max_seconds": round(timer["max"], 6),
+                            "buckets": {str(bound): count for bound, count in zip(self.buckets, timer["buckets"])}}
+                           for (name, labels), timer in sorted(self.timers.items())],
+                "gauges": [{"name": name, "labels": dict(labels), "value": gauge["value"], "max": gauge["max"]}
+                           for (name, labels), gauge in sorted(self.gauges.items())],
+            }
+
+    def merge(self, snapshot):
+        # Adds a snapshot taken in another process (a --batch job) to these metrics
+        with self.lock:
+            for counter in snapshot.get("counters", []):
+                key = (counter["name"], tuple(sorted(counter["labels"].items())))
+                self.counters[key] = self.counters.get(key, 0) + counter["value"]
+            for entry in snapshot.get("timers", []):
+                key = (entry["name"], tuple(sorted(entry["labels"].items())))
+                timer = self.timers.get(key)
+                if timer is None:
+                    timer = self.timers[key] = {"count": 0, "sum": 0.0, "min": entry["min_seconds"], "max": entry["max_seconds"],
+                                                "buckets": [0] * len(self.buckets)}
+                timer["count"] += entry["count"]
+                timer["sum"] += entry["sum_seconds"]
+                timer["min"] = min(timer["min"], entry["min_seconds"])
+                timer["max"] = max(timer["max"], entry["max_seconds"])
+                for position, bound in enumerate(self.buckets):
+                    timer["buckets"][position] += entry["buckets"].get(str(bound), 0)
+            for entry in snapshot.get("gauges", []):
+                key = (entry["name"], tuple(sorted(entry["labels"].items())))
+                gauge = self.gauges.get(key)
+                if gauge is None:
+                    gauge = self.gauges[key] = {"value": entry["value"], "max": entry["max"]}
+                gauge["value"] = entry["value"]
+                gauge["max"] = max(gauge["max"], entry["max"])
+
+    def to_prometheus(self):
+        def label_text(labels, extra=()):
+            pairs = list(labels) + list(extra)
+            return "{" + ",".join(f'{key}="{escape_label(value)}"' for key, value in pairs) + "}" if pairs else ""
+
+        lines = []
+        with self.lock:
+            for name in sorted({name for name, _ in self.counters}):
+                lines.append(f"# TYPE metastringer_{name}_total counter")
+                for (counter_name, labels), value in sorted(self.counters.items()):
+                    if counter_name == name:
+                        lines.append(f"metastringer_{name}_total{label_text(labels)} {value}")
+            for name in sorted({name for name, _ in self.timers}):
+                lines.append(f"# TYPE metastringer_{name}_seconds histogram")
+                for (timer_name, labels), timer in sorted(self.timers.items()):
+                    if timer_name != name:
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(self.buckets, timer["buckets"]):
+                        cumulative += count
+                        lines.append(f"metastringer_{name}_seconds_bucket{label_text(labels, [('le', bound)])} {cumulative}")
+                    lines.append(f"metastringer_{name}_seconds_bucket{label_text(labels, [('le', '+Inf')])} {timer['count']}")
+                    lines.append(f"metastringer_{name}_seconds_sum{label_text(labels)} {timer['sum']:.6f}")
+                    lines.append(f"metastringer_{name}_seconds_count{label_text(labels)} {timer['count']}")
+            for name in sorted({name for name, _ in self.gauges}):
+                # The last and the peak value are two metric families, each listed whole under its TYPE line
+                for suffix, field in (("", "value"), ("_max", "max")):
+                    lines.append(f"# TYPE metastringer_{name}{suffix} gauge")
+                    for (gauge_name, labels), gauge in sorted(self.gauges.items()):
+                        if gauge_name == name:
+                            lines.append(f"metastringer_{name}{suffix}{label_text(labels)} {gauge[field]}")
+            lines.append("# TYPE metastringer_wall_seconds gauge")
+            lines.append(f"metastringer_wall_seconds {time.time() - self.started:.3f}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        # Prometheus textfile for *.prom paths, JSON otherwise; written beside and swapped in
+        temp_path = path + ".part"
+        with open(temp_path, 'w', encoding='utf-8') as metrics_file:
+            if path.endswith(".prom"):
+                metrics_file.write(self.to_prometheus())
+            else:
+                json.dump(self.snapshot(), metrics_file, indent=2)
+        os.replace(temp_path, path)
+
+
+def escape_label(value):
+    # Prometheus label values escape backslash, double quote and newline
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+metrics = Metrics()
+
+# cProfile state for --profile: one profiler per thread that runs a hot path, merged at exit
+profiling = False
+profilers = []
+profiler_local = threading.local()
+
+
+def profiled(function):
+    # Wraps a worker-thread hot path so it is included in the --profile output
+    if not profiling:
+        return function
+    import cProfile
+
+    def wrapper(*args, **kwargs):
+        profiler = getattr(profiler_local, "profiler", None)
+        if profiler is None:
+            profiler = profiler_local.profiler = cProfile.Profile()
+            profilers.append(profiler)
+        profiler.enable()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            profiler.disable()
+    return wrapper
+
+
+def write_profile(path):
+    import pstats
+    stats = pstats.Stats(profilers[0])
+    for profiler in profilers[1:]:
+        stats.add(profiler)
+    stats.dump_stats(path)
+    print(f"\nProfile written to {path}; hottest functions by cumulative time:", file=sys.stderr)
+    stats.stream = sys.stderr
+    stats.sort_stats("cumulative").print_stats(15)
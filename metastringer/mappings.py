@@ -0,0 +1,195 @@
+# Extension and MIME type tables. classify imports them on first use, so runs that never classify a
+# listing (--help, --show-results, --evict-results) don't build them.
+
+mime_type_mapping = {
+    "application/pdf": {"definite": ".pdf"},
+    "application/msword": {"definite": ".doc"},
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document": {"definite": ".docx"},
+    "application/vnd.ms-excel": {"definite": ".xls"},
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet": {"definite": ".xlsx"},
+    "application/vnd.ms-powerpoint": {"definite": ".ppt"},
+    "application/vnd.openxmlformats-officedocument.presentationml.presentation": {"definite": ".pptx"},
+    "application/javascript": {"definite": ".js"},
+    "application/json": {"definite": ".json"},
+    "application/xml": {"definite": ".xml"},
+    "text/html": {"definite": ".html"},
+    "text/css": {"definite": ".css"},
+    "text/csv": {"definite": ".csv"},
+    "text/plain": {"definite": ".txt"},
+    "image/jpeg": {"definite": ".jpg"},
+    "image/png": {"definite": ".png"},
+    "image/gif": {"definite": ".gif"},
+    "image/svg+xml": {"definite": ".svg"},
+    "image/tiff": {"definite": ".tiff"},
+    "image/bmp": {"definite": ".bmp"},
+    "image/webp": {"definite": ".webp"},
+    "image/x-icon": {"definite": ".ico"},
+    "audio/mpeg": {"definite": ".mp3"},
+    "audio/ogg": {"definite": ".ogg"},
+    "audio/wav": {"definite": ".wav"},
+    "audio/aac": {"definite": ".aac"},
+    "audio/midi": {"definite": ".midi"},
+    "video/mp4": {"definite": ".mp4"},
+    "video/mpeg": {"definite": ".mpeg"},
+    "video/ogg": {"definite": ".ogv"},
+    "video/webm": {"definite": ".webm"},
+    "video/quicktime": {"definite": ".mov"},
+    "video/x-msvideo": {"definite": ".avi"},
+    "video/x-ms-wmv": {"definite": ".wmv"},
+    "application/zip": {"definite": ".zip"},
+    "application/x-rar-compressed": {"definite": ".rar"},
+    "application/x-tar": {"definite": ".tar"},
+    "application/gzip": {"definite": ".gz"},
+    "application/x-7z-compressed": {"definite": ".7z"},
+    "application/x-iso9660-image": {"definite": ".iso"},
+    "application/vnd.adobe.flash.movie": {"definite": ".swf"},
+    "application/x-shockwave-flash": {"definite": ".swf"},
+    "application/java-archive": {"definite": ".jar"},
+    "application/x-perl": {"definite": ".pl"},
+    "application/x-python": {"definite": ".py"},
+    "application/x-ruby": {"definite": ".rb"},
+    "application/x-php": {"definite": ".php"},
+    "application/x-httpd-php": {"definite": ".php"},
+    "application/vnd.apple.installer+xml": {"definite": ".mpkg"},
+    "application/x-dosexec": {"definite": ".exe"},
+    "application/x-msdownload": {"definite": ".exe"},
+    "application/x-font-ttf": {"definite": ".ttf"},
+    "application/font-woff": {"definite": ".woff"},
+    "application/font-woff2": {"definite": ".woff2"},
+    "application/octet-stream": {"likely": [".bin", ".exe", ".dll"]},
+    "application/octet-stream": {"likely": [".bin", ".exe", ".dll"]},
+    "application/vnd.ms-fontobject": {"definite": ".eot"},
+    "binary/octet-stream": {"likely": [".bin", ".class", ".dex"]},
+    "font/ttf": {"definite": ".ttf"},
+    "font/woff": {"definite": ".woff"},
+    "font/woff2": {"definite": ".woff2"},
+    "text/javascript": {"definite": ".js"},
+    "text/js": {"definite": ".js"},
+    "text/xml": {"definite": ".xml"},
+    "unk": {"likely": ["could be any binary data", "extension not provided"]},
+    "warc/revisit": {"likely": ["specific to web archiving; not a typical file extension"]},
+}
+
+
+strictness_2_mime_mapping = {
+    "pdf": ["application/pdf"],
+    "doc": ["application/msword"],
+    "docx": ["application/vnd.openxmlformats-officedocument.wordprocessingml.document"],
+    "xls": ["application/vnd.ms-excel"],
+    "xlsx": ["application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"],
+    "ppt": ["application/vnd.ms-powerpoint"],
+    "pptx": ["application/vnd.openxmlformats-officedocument.presentationml.presentation"],
+}
+
+
+strictness_1_mime_mapping = {
+    "pdf": "application/pdf",
+    "doc": "application/msword",
+    "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "xls": "application/vnd.ms-excel",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "ppt": "application/vnd.ms-powerpoint",
+    "pptx": "application/vnd.openxmlformats-officedocument.presentationml.presentation",
+    "jpg": "image/jpeg",
+    "jpeg": "image/jpeg",
+    "png": "image/png",
+    "gif": "image/gif",
+    "svg": "image/svg+xml",
+    "tiff": "image/tiff",
+    "bmp": "image/bmp",
+    "webp": "image/webp",
+    "ico": "image/x-icon",
+    "mp3": "audio/mpeg",
+    "ogg": "audio/ogg",
+    "wav": "audio/wav",
+    "aac": "audio/aac",
+    "midi": "audio/midi",
+    "mp4": "video/mp4",
+    "mpeg": "video/mpeg",
+    "ogv": "video/ogg",
+    "webm": "video/webm",
+    "mov": "video/quicktime",
+    "avi": "video/x-msvideo",
+    "wmv": "video/x-ms-wmv",
+    "zip": "application/zip",
+    "rar": "application/x-rar-compressed",
+    "tar": "application/x-tar",
+    "gz": "application/gzip",
+    "7z": "application/x-7z-compressed",
+    "iso": "application/x-iso9660-image",
+    "swf": "application/x-shockwave-flash",
+    "jar": "application/java-archive",
+    "py": "application/x-python",
+    "php": "application/x-httpd-php",
+    "html": "text/html",
+    "css": "text/css",
+    "csv": "text/csv",
+    "txt": "text/plain",
+    "xml": "application/xml",
+    "json": "application/json",
+    "js": "application/javascript",
+}
+
+
+strictness_0_mime_mapping = {
+    "pdf": ["application/pdf", "text/html", "application/octet-stream"],
+    "doc": ["application/msword", "text/html", "application/octet-stream"],
+    "docx": ["application/vnd.openxmlformats-officedocument.wordprocessingml.document", "text/html", "application/octet-stream"],
+    "xls": ["application/vnd.ms-excel", "text/html", "application/octet-stream"],
+    "xlsx": ["application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "text/html", "application/octet-stream"],
+    "ppt": ["application/vnd.ms-powerpoint", "text/html", "application/octet-stream"],
+    "pptx": ["application/vnd.openxmlformats-officedocument.presentationml.presentation", "text/html", "application/octet-stream"],
+    "jpg": ["image/jpeg", "text/html", "application/octet-stream"],
+    "jpeg": ["image/jpeg", "text/html", "application/octet-stream"],
+    "png": ["image/png", "text/html", "application/octet-stream"],
+    "gif": ["image/gif", "text/html", "application/octet-stream"],
+    "svg": ["image/svg+xml", "text/html", "application/octet-stream"],
+    "tiff": ["image/tiff", "text/html", "application/octet-stream"],
+    "bmp": ["image/bmp", "text/html", "application/octet-stream"],
+    "webp": ["image/webp", "text/html", "application/octet-stream"],
+    "ico": ["image/x-icon", "text/html", "application/octet-stream"],
+    "mp3": ["audio/mpeg", "text/html", "application/octet-stream"],
+    "ogg": ["audio/ogg", "text/html", "application/octet-stream"],
+    "wav": ["audio/wav", "text/html", "application/octet-stream"],
+    "aac": ["audio/aac", "text/html", "application/octet-stream"],
+    "midi": ["audio/midi", "text/html", "application/octet-stream"],
+    "mp4": ["video/mp4", "text/html", "application/octet-stream"],
+    "mpeg": ["video/mpeg", "text/html", "application/octet-stream"],
+    "ogv": ["video/ogg", "text/html", "application/octet-stream"],
+    "webm": ["video/webm", "text/html", "application/octet-stream"],
+    "mov": ["video/quicktime", "text/html", "application/octet-stream"],
+    "avi": ["video/x-msvideo", "text/html", "application/octet-stream"],
+    "wmv": ["video/x-ms-wmv", "text/html", "application/octet-stream"],
+    "zip": ["application/zip", "text/html", "application/octet-stream"],
+    "rar": ["application/x-rar-compressed", "text/html", "application/octet-stream"],
+    "tar": ["application/x-tar", "text/html", "application/octet-stream"],
+    "gz": ["application/gzip", "text/html", "application/octet-stream"],
+    "7z": ["application/x-7z-compressed", "text/html", "application/octet-stream"],
+    "iso": ["application/x-iso9660-image", "text/html", "application/octet-stream"],
+    "swf": ["application/x-shockwave-flash", "text/html", "application/octet-stream"],
+    "jar": ["application/java-archive", "text/html", "application/octet-stream"],
+    "py": ["application/x-python", "text/html", "application/octet-stream"],
+    "php": ["application/x-httpd-php", "text/html", "application/octet-stream"],
+    "html": ["text/html", "application/octet-stream"],
+    "css": ["text/css", "text/html", "application/octet-stream"],
+    "csv": ["text/csv", "text/html", "application/octet-stream"],
+    "txt": ["text/plain", "text/html", "application/octet-stream"],
+    "xml": ["application/xml", "text/html", "application/octet-stream", "text/plain"],
+    "json": ["application/json", "text/html", "application/octet-stream", "text/plain"],
+    "js": ["application/javascript", "text/html", "application/octet-stream", "text/plain"],
+}
+
+
+# Where a MIME type has only one good file extension
+exclusive_mime_type_mapping = {
+    "image/gif": ".gif",
+    "image/jpeg": ".jpg",
+}
+
+
+# Used to highlight extensions of interest in MIME type table
+highlight_types = {
+    "application/pdf": ".pdf",
+    "application/msword": ".doc",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document": ".docx",
+}
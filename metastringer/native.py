@@ -0,0 +1,816 @@
+# Built-in metadata readers for the formats sweeps target: PDF (Info dictionary and XMP), OOXML
+# (docProps/core.xml and app.xml), legacy OLE documents (SummaryInformation) and JPEG (EXIF and XMP).
+# Each reader pulls only the structures it needs through a random-access reader, so the same code
+# works on a memory-mapped file or an in-memory buffer. Keys follow ExifTool's tag descriptions, as
+# process_metadata returns them, so results are interchangeable with ExifTool's.
+
+import io
+import mmap
+import os
+import re
+import struct
+import zlib
+import zipfile
+from datetime import datetime, timedelta, timezone
+
+
+class NativeFormatError(Exception):
+    # The file is not in a supported format, or uses a feature the readers leave to ExifTool
+    pass
+
+
+class Truncated(NativeFormatError):
+    # A structure ran past the bytes read so far; the caller reads a larger window
+    pass
+
+
+class BufferReader:
+    # Random access to bytes or an mmap
+    def __init__(self, data):
+        self.data = data
+        self.size = len(data)
+
+    def read(self, offset, length):
+        return bytes(self.data[max(0, offset):max(0, offset + length)])
+
+    def search(self, pattern):
+        # Offset of the first regex match in the whole file, or None (used when an index is broken)
+        match = re.search(pattern, self.data)
+        return match.start() if match else None
+
+
+class ReaderFile(io.RawIOBase):
+    # Seekable file object over a reader, for zipfile
+    def __init__(self, reader):
+        self.reader = reader
+        self.position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.position
+
+    def seek(self, offset, whence=0):
+        base = {0: 0, 1: self.position, 2: self.reader.size}[whence]
+        self.position = max(0, base + offset)
+        return self.position
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = self.reader.size - self.position
+        data = self.reader.read(self.position, min(size, max(0, self.reader.size - self.position)))
+        self.position += len(data)
+        return data
+
+    def readinto(self, buffer):
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+
+# What the readers (and zipfile, zlib, struct and xml.etree under them) raise on damaged, encrypted or
+# unusual files; SyntaxError covers xml.etree's ParseError, RuntimeError zipfile's NotImplementedError
+native_errors = (NativeFormatError, ValueError, LookupError, TypeError, AttributeError, EOFError, RuntimeError, struct.error,
+                 zlib.error, zipfile.BadZipFile, zipfile.LargeZipFile, SyntaxError, OverflowError)
+
+
+def read_metadata(reader, file_name=None):
+    # Metadata of a supported file as {ExifTool description: value}; raises NativeFormatError otherwise
+    head = reader.read(0, 1024)
+    if b"%PDF-" in head:
+        metadata = read_pdf_metadata(reader)
+    elif head.startswith(b"PK\x03\x04"):
+        metadata = read_ooxml_metadata(reader)
+    elif head.startswith(b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"):
+        metadata = read_ole_metadata(reader)
+    elif head.startswith(b"\xff\xd8\xff"):
+        metadata = read_jpeg_metadata(reader)
+    else:
+        raise NativeFormatError("unsupported format")
+    if file_name:
+        metadata = {"File Name": file_name, **metadata}
+    return {key: value for key, value in metadata.items() if value}
+
+
+def extract_native(file_path):
+    # Returns the metadata of file_path, or None if the built-in readers cannot handle it
+    file_name = os.path.basename(file_path)
+    if os.path.getsize(file_path) == 0:
+        return {}
+    try:
+        with open(file_path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return read_metadata(BufferReader(data), file_name)
+    except Exception:
+        # Anything a damaged, encrypted or unusual file makes the readers (or zipfile, zlib and xml.etree)
+        # raise: the built-in readers only save time, so the caller falls back to ExifTool
+        return None
+
+
+def text_value(value):
+    value = ', '.join(value) if isinstance(value, list) else value
+    return value.replace('\x00', '').strip() if isinstance(value, str) else value
+
+
+# --- XMP (PDF metadata streams and JPEG APP1) -----------------------------------------------------
+
+xmp_namespaces = {
+    "dc": "http://purl.org/dc/elements/1.1/",
+    "xmp": "http://ns.adobe.com/xap/1.0/",
+    "pdf": "http://ns.adobe.com/pdf/1.3/",
+    "rdf": "http://www.w3.org/1999/02/22-rdf-syntax-ns#",
+}
+xmp_tags = {
+    ("dc", "creator"): "Creator",
+    ("dc", "title"): "Title",
+    ("dc", "description"): "Description",
+    ("dc", "rights"): "Rights",
+    ("xmp", "CreatorTool"): "Creator Tool",
+    ("xmp", "CreateDate"): "Create Date",
+    ("xmp", "ModifyDate"): "Modify Date",
+    ("pdf", "Producer"): "Producer",
+    ("pdf", "Keywords"): "Keywords",
+}
+
+
+def read_xmp(packet):
+    from xml.etree import ElementTree
+    start = packet.find(b"<x:xmpmeta")
+    end = packet.rfind(b"</x:xmpmeta>") + len(b"</x:xmpmeta>")
+    if start < 0 or end < start:
+        start = packet.find(b"<rdf:RDF")
+        end = packet.rfind(b"</rdf:RDF>") + len(b"</rdf:RDF>")
+    if start < 0 or end < start:
+        return {}
+    root = ElementTree.fromstring(packet[start:end])
+    rdf = xmp_namespaces["rdf"]
+    tags = {f"{{{xmp_namespaces[prefix]}}}{name}": key for (prefix, name), key in xmp_tags.items()}
+    metadata = {}
+    for description in root.iter(f"{{{rdf}}}Description"):
+        # Simple properties may be written as attributes of rdf:Description or as child elements
+        for name, value in description.attrib.items():
+            if name in tags:
+                metadata.setdefault(tags[name], value.strip())
+        for element in description:
+            if element.tag in tags:
+                items = [item.text.strip() for item in element.iter(f"{{{rdf}}}li") if item.text and item.text.strip()]
+                value = items if items else (element.text or "").strip()
+                metadata.setdefault(tags[element.tag], text_value(value))
+    return {key: value for key, value in metadata.items() if value}
+
+
+def exif_style_date(value):
+    # "2020-01-02T03:04:05Z" -> "2020:01:02 03:04:05Z", as ExifTool prints dates
+    match = re.match(r"(\d{4})-(\d{2})-(\d{2})(?:T(\d{2}:\d{2}(?::\d{2})?)(.*))?$", value.strip())
+    if not match:
+        return value.strip()
+    year, month, day, clock, zone = match.groups()
+    return f"{year}:{month}:{day}" + (f" {clock}{zone or ''}" if clock else "")
+
+
+# --- PDF ------------------------------------------------------------------------------------------
+
+pdf_whitespace = b" \t\r\n\x0c\x00"
+pdf_delimiters = b"()<>[]{}/%"
+pdf_reference = re.compile(rb"\s+(\d+)\s+R(?![^\s()<>\[\]{}/%])")
+pdf_octal_escape = re.compile(rb"[0-7]{1,3}")
+pdf_object_header = re.compile(rb"\s*\d+\s+\d+\s+obj")
+pdf_stream_keyword = re.compile(rb"\s*stream(\r\n|\n|\r)")
+xref_subsection = re.compile(rb"\s*(\d+)\s+(\d+)")
+xref_entry = re.compile(rb"\s*(\d{10})\s(\d{5})\s([nf])")
+pdf_info_tags = {
+    "/Title": "Title",
+    "/Author": "Author",
+    "/Subject": "Subject",
+    "/Keywords": "Keywords",
+    "/Creator": "Creator",
+    "/Producer": "Producer",
+    "/CreationDate": "Create Date",
+    "/ModDate": "Modify Date",
+}
+
+
+class PDFRef:
+    __slots__ = ("number", "generation")
+
+    def __init__(self, number, generation):
+        self.number = number
+        self.generation = generation
+
+
+class PDFStream:
+    __slots__ = ("dictionary", "offset")
+
+    def __init__(self, dictionary, offset):
+        self.dictionary = dictionary
+        self.offset = offset  # File offset of the first data byte
+
+
+def skip_pdf_space(data, pos):
+    while True:
+        if pos >= len(data):
+            raise Truncated("PDF object runs past the bytes read")
+        byte = data[pos]
+        if byte in pdf_whitespace:
+            pos += 1
+        elif byte == 0x25:  # % comment to end of line
+            while pos < len(data) and data[pos] not in b"\r\n":
+                pos += 1
+        else:
+            return pos
+
+
+def parse_pdf_value(data, pos):
+    # Parses one PDF object at pos: returns (value, position after it). Names come back as str
+    # ("/Author"), strings as bytes, references as PDFRef.
+    pos = skip_pdf_space(data, pos)
+    byte = data[pos]
+    if data.startswith(b"<<", pos):
+        dictionary = {}
+        pos += 2
+        while True:
+            pos = skip_pdf_space(data, pos)
+            if data.startswith(b">>", pos):
+                return dictionary, pos + 2
+            key, pos = parse_pdf_value(data, pos)
+            value, pos = parse_pdf_value(data, pos)
+            if isinstance(key, str):
+                dictionary[key] = value
+    if byte == 0x3C:  # <hex string>
+        end = data.find(b">", pos)
+        if end < 0:
+            raise Truncated("unterminated hex string")
+        digits = re.sub(rb"[^0-9A-Fa-f]", b"", data[pos + 1:end])
+        return bytes.fromhex((digits + b"0" * (len(digits) % 2)).decode()), end + 1
+    if byte == 0x5B:  # [array]
+        items = []
+        pos += 1
+        while True:
+            pos = skip_pdf_space(data, pos)
+            if data[pos] == 0x5D:
+                return items, pos + 1
+            item, pos = parse_pdf_value(data, pos)
+            items.append(item)
+    if byte == 0x28:  # (literal string)
+        return parse_pdf_string(data, pos + 1)
+    if byte == 0x2F:  # /Name
+        end = pos + 1
+        while end < len(data) and data[end] not in pdf_whitespace and data[end] not in pdf_delimiters:
+            end += 1
+        name = re.sub(rb"#([0-9A-Fa-f]{2})", lambda match: bytes([int(match.group(1), 16)]), data[pos:end])
+        return name.decode('latin-1'), end
+    end = pos
+    while end < len(data) and data[end] not in pdf_whitespace and data[end] not in pdf_delimiters:
+        end += 1
+    if end >= len(data):
+        raise Truncated("PDF token runs past the bytes read")
+    token = data[pos:end]
+    if re.fullmatch(rb"\d+", token):
+        # An integer may start an indirect reference: "12 0 R"
+        match = pdf_reference.match(data, end)
+        if match:
+            return PDFRef(int(token), int(match.group(1))), match.end()
+        return int(token), end
+    if re.fullmatch(rb"[+-]?(\d+\.?\d*|\.\d+)", token):
+        return float(token) if b"." in token else int(token), end
+    keywords = {b"true": True, b"false": False, b"null": None}
+    if token in keywords:
+        return keywords[token], end
+    raise NativeFormatError(f"unexpected PDF token {token[:20]!r}")
+
+
+def parse_pdf_string(data, pos):
+    escapes = {ord("n"): b"\n", ord("r"): b"\r", ord("t"): b"\t", ord("b"): b"\b", ord("f"): b"\f"}
+    output = bytearray()
+    depth = 1
+    while True:
+        if pos >= len(data):
+            raise Truncated("unterminated string")
+        byte = data[pos]
+        if byte == 0x5C:  # backslash
+            following = data[pos + 1:pos + 2]
+            if not following:
+                raise Truncated("unterminated string")
+            octal = pdf_octal_escape.match(data, pos + 1)
+            if octal:
+                output.append(int(octal.group(), 8) & 0xFF)
+                pos = octal.end()
+                continue
+            if following in b"\r\n":
+                pos += 3 if data[pos + 1:pos + 3] == b"\r\n" else 2  # Line continuation
+                continue
+            output += escapes.get(following[0], following)
+            pos += 2
+            continue
+        if byte == 0x28:
+            depth += 1
+        elif byte == 0x29:
+            depth -= 1
+            if depth == 0:
+                return bytes(output), pos + 1
+        output.append(byte)
+        pos += 1
+
+
+def decode_pdf_text(value):
+    if isinstance(value, bytes):
+        if value.startswith(b"\xfe\xff"):
+            return value[2:].decode("utf-16-be", errors="replace")
+        if value.startswith(b"\xef\xbb\xbf"):
+            return value[3:].decode("utf-8", errors="replace")
+        return value.decode("latin-1")  # PDFDocEncoding matches Latin-1 for ordinary text
+    if isinstance(value, (int, float)):
+        return str(value)
+    return value if isinstance(value, str) else None
+
+
+def pdf_date(value):
+    # "D:20200102030405+01'00'" -> "2020:01:02 03:04:05+01:00"
+    match = re.match(r"(?:D:)?(\d{4})(\d{2})?(\d{2})?(\d{2})?(\d{2})?(\d{2})?(Z|[+-]\d{2}'?\d{2}'?)?", value.strip())
+    if not match:
+        return value.strip()
+    year, month, day, hour, minute, second, zone = match.groups()
+    text = f"{year}:{month or '01'}:{day or '01'} {hour or '00'}:{minute or '00'}:{second or '00'}"
+    if zone:
+        text += "Z" if zone == "Z" else f"{zone[:3]}:{zone.replace(chr(39), '')[3:5]}"
+    return text
+
+
+def png_unpredict(data, columns):
+    # Reverses the PNG row predictors (/Predictor >= 10) used by xref streams, one byte per pixel
+    rows = []
+    previous = bytearray(columns)
+    for start in range(0, len(data), columns + 1):
+        kind, row = data[start], bytearray(data[start + 1:start + 1 + columns])
+        for i in range(len(row)):
+            left = row[i - 1] if i else 0
+            up = previous[i]
+            if kind == 1:
+                row[i] = (row[i] + left) & 0xFF
+            elif kind == 2:
+                row[i] = (row[i] + up) & 0xFF
+            elif kind == 3:
+                row[i] = (row[i] + (left + up) // 2) & 0xFF
+            elif kind == 4:
+                upper_left = previous[i - 1] if i else 0
+                estimate = left + up - upper_left
+                nearest = min((abs(estimate - left), 0, left), (abs(estimate - up), 1, up), (abs(estimate - upper_left), 2, upper_left))
+                row[i] = (row[i] + nearest[2]) & 0xFF
+        rows.append(bytes(row))
+        previous = row
+    return b"".join(rows)
+
+
+class PDFDocument:
+    # Just enough of a PDF reader to reach the trailer's /Info dictionary and the catalog's /Metadata
+    def __init__(self, reader):
+        self.reader = reader
+        self.xref = {}  # Object number -> ("offset", file offset) or ("compressed", object stream, index)
+        self.objects = {}
+        self.object_streams = {}
+        self.trailer = self.load_xref()
+
+    def load_xref(self):
+        tail = self.reader.read(self.reader.size - 4096, 4096)
+        position = tail.rfind(b"startxref")
+        if position < 0:
+            raise NativeFormatError("no startxref")
+        offset = int(tail[position + 9:].split()[0])
+        trailer = {}
+        seen = set()
+        # Newest section first; older sections (/Prev) only add objects not yet defined
+        while isinstance(offset, int) and offset not in seen and len(seen) < 64:
+            seen.add(offset)
+            if self.reader.read(offset, 32).lstrip().startswith(b"xref"):
+                section = self.read_window(offset, self.parse_xref_table)
+                if isinstance(section.get("/XRefStm"), int):
+                    self.read_xref_stream(section["/XRefStm"])
+            else:
+                section = self.read_xref_stream(offset)
+            for key, value in section.items():
+                trailer.setdefault(key, value)
+            offset = section.get("/Prev")
+        return trailer
+
+    def read_window(self, offset, parse, window=4096):
+        # Calls parse(data, offset) on a window at offset, growing it while the structure is cut short
+        while True:
+            data = self.reader.read(offset, window)
+            try:
+                return parse(data, offset)
+            except Truncated:
+                if offset + window >= self.reader.size:
+                    raise
+                window *= 4
+
+    def parse_xref_table(self, data, offset):
+        pos = data.index(b"xref") + 4
+        entries = {}
+        while True:
+            pos = skip_pdf_space(data, pos)
+            if data.startswith(b"trailer", pos):
+                section, _ = parse_pdf_value(data, pos + 7)
+                for number, location in entries.items():
+                    self.xref.setdefault(number, location)
+                return section
+            match = xref_subsection.match(data, pos)
+            if not match:
+                raise Truncated("xref table cut short") if len(data) - pos < 32 else NativeFormatError("bad xref table")
+            first, count = int(match.group(1)), int(match.group(2))
+            pos = match.end()
+            for number in range(first, first + count):
+                match = xref_entry.match(data, pos)
+                if not match:
+                    raise Truncated("xref table cut short") if len(data) - pos < 24 else NativeFormatError("bad xref entry")
+                if match.group(3) == b"n":
+                    entries.setdefault(number, ("offset", int(match.group(1))))
+                pos = match.end()
+
+    def read_xref_stream(self, offset):
+        stream = self.read_object_at(offset)
+        if not isinstance(stream, PDFStream) or stream.dictionary.get("/Type") != "/XRef":
+            raise NativeFormatError("startxref does not point at an xref table or stream")
+        dictionary = stream.dictionary
+        widths = [self.resolve(width) for width in dictionary["/W"]]
+        index = dictionary.get("/Index") or [0, dictionary["/Size"]]
+        data = self.stream_data(stream)
+        entry_size = sum(widths)
+        pos = 0
+        for first, count in zip(index[0::2], index[1::2]):
+            for number in range(first, first + count):
+                fields = []
+                for width in widths:
+                    fields.append(int.from_bytes(data[pos:pos + width], "big") if width else None)
+                    pos += width
+                kind = 1 if widths[0] == 0 else fields[0]
+                if kind == 1:
+                    self.xref.setdefault(number, ("offset", fields[1]))
+                elif kind == 2:
+                    self.xref.setdefault(number, ("compressed", fields[1], fields[2] or 0))
+                if pos + entry_size > len(data):
+                    return dictionary
+        return dictionary
+
+    def read_object_at(self, offset):
+        def parse(data, _):
+            match = pdf_object_header.match(data)
+            if not match:
+                raise Truncated("object header cut short") if len(data) < 32 else NativeFormatError("no object at offset")
+            value, pos = parse_pdf_value(data, match.end())
+            if isinstance(value, dict):
+                keyword = pdf_stream_keyword.match(data, pos)
+                if keyword:
+                    return PDFStream(value, offset + keyword.end())
+                if len(data) - pos < 16:
+                    raise Truncated("stream keyword cut short")
+            return value
+        return self.read_window(offset, parse)
+
+    def stream_data(self, stream):
+        dictionary = stream.dictionary
+        raw = self.reader.read(stream.offset, self.resolve(dictionary["/Length"]))
+        filters = self.resolve(dictionary.get("/Filter"))
+        filters = filters if isinstance(filters, list) else [filters] if filters else []
+        parameters = self.resolve(dictionary.get("/DecodeParms")) or {}
+        parameters = parameters[0] if isinstance(parameters, list) and parameters else parameters
+        for name in filters:
+            if name not in ("/FlateDecode", "/Fl"):
+                raise NativeFormatError(f"unsupported stream filter {name}")
+            raw = zlib.decompressobj().decompress(raw)
+            predictor = parameters.get("/Predictor", 1) if isinstance(parameters, dict) else 1
+            if predictor >= 10:
+                raw = png_unpredict(raw, parameters.get("/Columns", 1))
+            elif predictor != 1:
+                raise NativeFormatError("unsupported predictor")
+        return raw
+
+    def get_object(self, number):
+        if number in self.objects:
+            return self.objects[number]
+        location = self.xref.get(number)
+        if location is None:
+            # Damaged or missing xref entry: look for the object itself (only possible on local files)
+            search = getattr(self.reader, "search", None)
+            offset = search(rb"(?<![0-9])%d\s+\d+\s+obj" % number) if search else None
+            if offset is None:
+                raise NativeFormatError(f"object {number} not found")
+            location = ("offset", offset)
+        if location[0] == "offset":
+            value = self.read_object_at(location[1])
+        else:
+            value = self.compressed_object(location[1], location[2])
+        self.objects[number] = value
+        return value
+
+    def compressed_object(self, stream_number, index):
+        if stream_number not in self.object_streams:
+            stream = self.get_object(stream_number)
+            if not isinstance(stream, PDFStream):
+                raise NativeFormatError("object stream missing")
+            data = self.stream_data(stream)
+            count, first = self.resolve(stream.dictionary["/N"]), self.resolve(stream.dictionary["/First"])
+            numbers = [int(number) for number in data[:first].split()[:2 * count]]
+            self.object_streams[stream_number] = (data, first, numbers[1::2])
+        data, first, offsets = self.object_streams[stream_number]
+        value, _ = parse_pdf_value(data + b" ", first + offsets[index])
+        return value
+
+    def resolve(self, value, depth=0):
+        while isinstance(value, PDFRef) and depth < 32:
+            value = self.get_object(value.number)
+            depth += 1
+        return value
+
+
+def read_pdf_metadata(reader):
+    document = PDFDocument(reader)
+    if "/Encrypt" in document.trailer:
+        raise NativeFormatError("encrypted PDF")  # ExifTool can decrypt the common cases
+    metadata = {}
+    info = document.resolve(document.trailer.get("/Info"))
+    if isinstance(info, dict):
+        for name, key in pdf_info_tags.items():
+            value = decode_pdf_text(document.resolve(info.get(name)))
+            if value:
+                metadata[key] = pdf_date(value) if key.endswith("Date") else text_value(value)
+    catalog = document.resolve(document.trailer.get("/Root"))
+    stream = document.resolve(catalog.get("/Metadata")) if isinstance(catalog, dict) else None
+    if isinstance(stream, PDFStream):
+        # The Info dictionary wins where both have a value, as it does in ExifTool's PDF group
+        for key, value in read_xmp(document.stream_data(stream)).items():
+            metadata.setdefault(key, value)
+    return metadata
+
+
+# --- OOXML ----------------------------------------------------------------------------------------
+
+ooxml_core_tags = {
+    "{http://purl.org/dc/elements/1.1/}creator": "Creator",
+    "{http://purl.org/dc/elements/1.1/}title": "Title",
+    "{http://purl.org/dc/elements/1.1/}subject": "Subject",
+    "{http://purl.org/dc/elements/1.1/}description": "Description",
+    "{http://schemas.openxmlformats.org/package/2006/metadata/core-properties}lastModifiedBy": "Last Modified By",
+    "{http://schemas.openxmlformats.org/package/2006/metadata/core-properties}keywords": "Keywords",
+    "{http://schemas.openxmlformats.org/package/2006/metadata/core-properties}revision": "Revision Number",
+    "{http://schemas.openxmlformats.org/package/2006/metadata/core-properties}category": "Category",
+    "{http://purl.org/dc/terms/}created": "Create Date",
+    "{http://purl.org/dc/terms/}modified": "Modify Date",
+}
+ooxml_app_tags = {
+    "Application": "Application",
+    "AppVersion": "App Version",
+    "Company": "Company",
+    "Manager": "Manager",
+    "Template": "Template",
+}
+
+
+def read_ooxml_metadata(reader):
+    from xml.etree import ElementTree
+    with zipfile.ZipFile(ReaderFile(reader)) as archive:
+        names = set(archive.namelist())
+        core, app = "docProps/core.xml", "docProps/app.xml"
+        if "_rels/.rels" in names:
+            # The package relationships say where the property parts are, whatever they are called
+            for relationship in ElementTree.fromstring(archive.read("_rels/.rels")):
+                kind, target = relationship.get("Type", ""), relationship.get("Target", "").lstrip("/")
+                if kind.endswith("/core-properties"):
+                    core = target
+                elif kind.endswith("/extended-properties"):
+                    app = target
+        if core not in names and app not in names:
+            raise NativeFormatError("ZIP file without OOXML document properties")
+        metadata = {}
+        if core in names:
+            for element in ElementTree.fromstring(archive.read(core)):
+                if element.tag in ooxml_core_tags and element.text and element.text.strip():
+                    key = ooxml_core_tags[element.tag]
+                    metadata[key] = exif_style_date(element.text) if key.endswith("Date") else element.text.strip()
+        if app in names:
+            for element in ElementTree.fromstring(archive.read(app)):
+                name = element.tag.rsplit("}", 1)[-1]
+                if name in ooxml_app_tags and element.text and element.text.strip():
+                    metadata[ooxml_app_tags[name]] = element.text.strip()
+    return metadata
+
+
+# --- OLE compound documents (.doc, .xls, .ppt) ----------------------------------------------------
+
+ole_summary_tags = {2: "Title", 3: "Subject", 4: "Author", 5: "Keywords", 6: "Comments", 7: "Template",
+                    8: "Last Modified By", 9: "Revision Number", 12: "Create Date", 13: "Modify Date", 18: "Software"}
+ole_document_summary_tags = {2: "Category", 14: "Manager", 15: "Company"}
+ole_end_of_chain = 0xFFFFFFFA  # Sector numbers from here up are markers, not sectors
+
+
+class OLEFile:
+    # Reads streams of a compound file through the FAT, loading FAT and mini FAT sectors on demand
+    def __init__(self, reader):
+        self.reader = reader
+        header = reader.read(0, 512)
+        if len(header) < 512:
+            raise NativeFormatError("short OLE header")
+        self.sector_size = 1 << struct.unpack_from("<H", header, 0x1E)[0]
+        self.mini_sector_size = 1 << struct.unpack_from("<H", header, 0x20)[0]
+        fat_count, self.first_directory = struct.unpack_from("<II", header, 0x2C)
+        self.mini_cutoff, self.first_mini_fat = struct.unpack_from("<II", header, 0x38)
+        first_difat, difat_count = struct.unpack_from("<II", header, 0x44)
+        difat = list(struct.unpack_from("<109I", header, 0x4C))
+        sector = first_difat
+        for _ in range(difat_count):
+            if sector >= ole_end_of_chain:
+                break
+            entries = struct.unpack(f"<{self.sector_size // 4}I", self.read_sector(sector))
+            difat.extend(entries[:-1])
+            sector = entries[-1]
+        self.fat_sectors = [sector for sector in difat if sector < ole_end_of_chain][:fat_count]
+        self.fat_cache = {}
+        self.max_chain = reader.size // self.sector_size + 1
+        self.entries = self.read_directory()
+
+    def read_sector(self, sector):
+        return self.reader.read((sector + 1) * self.sector_size, self.sector_size)
+
+    def next_sector(self, sector):
+        per_sector = self.sector_size // 4
+        fat_sector = self.fat_sectors[sector // per_sector]
+        if fat_sector not in self.fat_cache:
+            self.fat_cache[fat_sector] = struct.unpack(f"<{per_sector}I", self.read_sector(fat_sector))
+        return self.fat_cache[fat_sector][sector % per_sector]
+
+    def chain(self, sector):
+        sectors = []
+        while sector < ole_end_of_chain:
+            sectors.append(sector)
+            if len(sectors) > self.max_chain:
+                raise NativeFormatError("FAT chain loops")
+            sector = self.next_sector(sector)
+        return sectors
+
+    def read_directory(self):
+        data = b"".join(self.read_sector(sector) for sector in self.chain(self.first_directory))
+        entries = {}
+        for pos in range(0, len(data) - 127, 128):
+            name_length, kind = struct.unpack_from("<HB", data, pos + 0x40)
+            if kind not in (1, 2, 5):
+                continue
+            name = data[pos:pos + max(0, name_length - 2)].decode("utf-16-le", errors="replace")
+            start, size = struct.unpack_from("<II", data, pos + 0x74)
+            entries[name if kind != 5 else "Root Entry"] = (start, size)
+        return entries
+
+    def read_stream(self, name):
+        start, size = self.entries[name]
+        if size >= self.mini_cutoff:
+            return b"".join(self.read_sector(sector) for sector in self.chain(start))[:size]
+        # Small streams live in the mini stream: 64-byte sectors inside the root entry's stream
+        root_sectors = self.chain(self.entries["Root Entry"][0])
+        mini_fat_sectors = self.chain(self.first_mini_fat)
+        mini_fat = {}
+        per_sector = self.sector_size // 4
+        output = []
+        sector = start
+        while sector < ole_end_of_chain and len(output) * self.mini_sector_size < size:
+            position = sector * self.mini_sector_size
+            big_sector = root_sectors[position // self.sector_size]
+            output.append(self.reader.read((big_sector + 1) * self.sector_size + position % self.sector_size, self.mini_sector_size))
+            fat_sector = mini_fat_sectors[sector // per_sector]
+            if fat_sector not in mini_fat:
+                mini_fat[fat_sector] = struct.unpack(f"<{per_sector}I", self.read_sector(fat_sector))
+            sector = mini_fat[fat_sector][sector % per_sector]
+        return b"".join(output)[:size]
+
+
+def read_property_set(data, tags):
+    # First section of an OLE property set stream, limited to the property IDs in tags
+    if len(data) < 48 or data[:2] != b"\xfe\xff":
+        return {}
+    section = struct.unpack_from("<I", data, 44)[0]
+    count = struct.unpack_from("<I", data, section + 4)[0]
+    properties = {}
+    for i in range(min(count, 1024)):
+        identifier, offset = struct.unpack_from("<II", data, section + 8 + 8 * i)
+        properties[identifier] = section + offset
+    codepage = 1252
+    if 1 in properties and struct.unpack_from("<H", data, properties[1])[0] == 2:  # VT_I2
+        codepage = struct.unpack_from("<H", data, properties[1] + 4)[0]
+    metadata = {}
+    for identifier, key in tags.items():
+        if identifier not in properties:
+            continue
+        pos = properties[identifier]
+        kind = struct.unpack_from("<H", data, pos)[0]
+        if kind == 0x1E:  # VT_LPSTR
+            length = struct.unpack_from("<I", data, pos + 4)[0]
+            raw = data[pos + 8:pos + 8 + length].split(b"\x00", 1)[0]
+            encoding = {65001: "utf-8", 1200: "utf-16-le"}.get(codepage, f"cp{codepage}")
+            try:
+                value = raw.decode(encoding, errors="replace")
+            except LookupError:
+                value = raw.decode("latin-1")
+        elif kind == 0x1F:  # VT_LPWSTR
+            length = struct.unpack_from("<I", data, pos + 4)[0]
+            value = data[pos + 8:pos + 8 + 2 * length].decode("utf-16-le", errors="replace")
+        elif kind == 0x40:  # VT_FILETIME
+            ticks = struct.unpack_from("<Q", data, pos + 4)[0]
+            if not ticks:
+                continue
+            value = (datetime(1601, 1, 1, tzinfo=timezone.utc) + timedelta(microseconds=ticks // 10)).strftime("%Y:%m:%d %H:%M:%S")
+        elif kind == 3:  # VT_I4
+            value = str(struct.unpack_from("<i", data, pos + 4)[0])
+        else:
+            continue
+        value = text_value(value)
+        if value:
+            metadata[key] = value
+    return metadata
+
+
+def read_ole_metadata(reader):
+    document = OLEFile(reader)
+    metadata = {}
+    for name, tags in (("\x05SummaryInformation", ole_summary_tags), ("\x05DocumentSummaryInformation", ole_document_summary_tags)):
+        if name in document.entries:
+            metadata.update(read_property_set(document.read_stream(name), tags))
+    return metadata
+
+
+# --- JPEG -----------------------------------------------------------------------------------------
+
+exif_ifd0_tags = {0x010E: "Image Description", 0x010F: "Make", 0x0110: "Camera Model Name", 0x0131: "Software",
+                  0x0132: "Modify Date", 0x013B: "Artist", 0x8298: "Copyright",
+                  0x9C9B: "XP Title", 0x9C9C: "XP Comment", 0x9C9D: "XP Author", 0x9C9F: "XP Subject"}
+exif_sub_ifd_tags = {0x9003: "Date/Time Original", 0xA430: "Owner Name", 0xA431: "Serial Number"}
+exif_type_sizes = {1: 1, 2: 1, 3: 2, 4: 4, 5: 8, 7: 1, 9: 4, 10: 8}
+xmp_app1_signature = b"http://ns.adobe.com/xap/1.0/\x00"
+
+
+def read_ifd(tiff, offset, order):
+    # {tag: (type, count, raw value bytes)} for one TIFF image file directory
+    count = struct.unpack_from(order + "H", tiff, offset)[0]
+    entries = {}
+    for i in range(min(count, 512)):
+        tag, kind, values = struct.unpack_from(order + "HHI", tiff, offset + 2 + 12 * i)
+        size = exif_type_sizes.get(kind, 1) * values
+        pos = offset + 2 + 12 * i + 8
+        if size > 4:
+            pos = struct.unpack_from(order + "I", tiff, pos)[0]
+        entries[tag] = (kind, values, tiff[pos:pos + size])
+    return entries
+
+
+def exif_text(kind, raw, key):
+    if key.startswith("XP "):
+        return raw.decode("utf-16-le", errors="replace")  # Windows XP tags are UTF-16 in a BYTE array
+    if kind == 2:
+        return raw.split(b"\x00", 1)[0].decode("utf-8", errors="replace")
+    return None
+
+
+def read_exif(tiff):
+    if tiff[:2] not in (b"II", b"MM"):
+        return {}
+    order = "<" if tiff[:2] == b"II" else ">"
+    metadata = {}
+    ifd0 = read_ifd(tiff, struct.unpack_from(order + "I", tiff, 4)[0], order)
+    for tag, key in exif_ifd0_tags.items():
+        if tag in ifd0:
+            metadata[key] = text_value(exif_text(ifd0[tag][0], ifd0[tag][2], key))
+    if 0x8769 in ifd0:  # Exif sub-IFD
+        sub_ifd = read_ifd(tiff, struct.unpack(order + "I", ifd0[0x8769][2][:4])[0], order)
+        for tag, key in exif_sub_ifd_tags.items():
+            if tag in sub_ifd:
+                metadata[key] = text_value(exif_text(sub_ifd[tag][0], sub_ifd[tag][2], key))
+    return metadata
+
+
+def read_jpeg_metadata(reader):
+    # Walks the marker segments up to the image data, reading only APP1 (EXIF and XMP) bodies
+    metadata = {}
+    pos = 2
+    while pos + 4 <= reader.size:
+        marker = reader.read(pos, 4)
+        if marker[0] != 0xFF:
+            raise NativeFormatError("bad JPEG marker")
+        code = marker[1]
+        if code == 0xFF:
+            pos += 1  # Fill byte
+            continue
+        if code == 0x01 or 0xD0 <= code <= 0xD8:
+            pos += 2  # Markers without a length
+            continue
+        if code in (0xD9, 0xDA):
+            break  # End of image, or start of the compressed scan
+        length = struct.unpack(">H", marker[2:4])[0]
+        if code == 0xE1:
+            segment = reader.read(pos + 4, length - 2)
+            if segment.startswith(b"Exif\x00\x00"):
+                for key, value in read_exif(segment[6:]).items():
+                    metadata.setdefault(key, value)
+            elif segment.startswith(xmp_app1_signature):
+                for key, value in read_xmp(segment[len(xmp_app1_signature):]).items():
+                    metadata.setdefault(key, value)
+        pos += 2 + length
+    return metadata
@@ -0,0 +1,287 @@
+# Where sweep results go: the SQLite results store, the streaming --output sinks and the
+# checkpoint journal read by --resume
+
+import atexit
+import csv
+import json
+import os
+import re
+import threading
+import time
+
+from . import download
+from .console import blue_start, blue_end, green_start, green_end, red_start, red_end
+from .extract import highlight_keys
+from .instrumentation import metrics
+
+
+# Durable record of every tested capture, so later sweeps only download untested ones
+results_store_path = "./cache/metadata_results.sqlite"
+
+
+class ResultsStore:
+    # SQLite store keyed by (original URL, capture timestamp), with the content digest when known
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        import sqlite3
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        with self.lock, self.connection:
+            self.connection.execute("""CREATE TABLE IF NOT EXISTS results (
+                original TEXT NOT NULL,
+                timestamp TEXT NOT NULL,
+                digest TEXT,
+                domain TEXT,
+                filetype TEXT,
+                outcome TEXT NOT NULL,
+                metadata TEXT,
+                tested_at REAL NOT NULL,
+                PRIMARY KEY (original, timestamp))""")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS results_digest ON results (digest)")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS results_domain ON results (domain, filetype)")
+
+    def lookup(self, original, timestamp, digest=None):
+        # Returns (outcome, metadata) for a capture already tested, or None
+        with self.lock:
+            row = self.connection.execute("SELECT outcome, metadata FROM results WHERE original = ? AND timestamp = ?",
+                                          (original, timestamp)).fetchone()
+            if row is None and digest:
+                row = self.connection.execute("SELECT outcome, metadata FROM results WHERE digest = ? AND outcome NOT IN ('download_failed', 'skipped_too_large') LIMIT 1",
+                                              (digest,)).fetchone()
+        if row is None:
+            return None
+        return row[0], json.loads(row[1] or '{}')
+
+    def record(self, original, timestamp, outcome, metadata, domain=None, filetype=None, digest=None):
+        with self.lock, self.connection:
+            self.connection.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                                    (original, timestamp, digest, domain, filetype, outcome, json.dumps(metadata), time.time()))
+
+    def query(self, domain=None, filetype=None, outcome=None):
+        clauses, params = [], []
+        for column, value in (("domain", domain), ("filetype", filetype), ("outcome", outcome)):
+            if value:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self.lock:
+            rows = self.connection.execute(f"SELECT original, timestamp, outcome, metadata, tested_at FROM results{where} ORDER BY tested_at", params).fetchall()
+        return [(original, timestamp, outcome, json.loads(metadata or '{}'), tested_at) for original, timestamp, outcome, metadata, tested_at in rows]
+
+    def evict_older_than(self, days):
+        with self.lock, self.connection:
+            return self.connection.execute("DELETE FROM results WHERE tested_at < ?", (time.time() - days * 86400,)).rowcount
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+
+results_store = None
+
+
+def get_results_store():
+    global results_store
+    if results_store is None:
+        results_store = ResultsStore(results_store_path)
+        atexit.register(results_store.close)
+    return results_store
+
+
+# Streaming result sinks (--output): each tested capture is appended as soon as its result is known
+result_fields = ["domain", "filetype", "original", "timestamp", "download_url", "digest", "outcome", "metadata", "tested_at"]
+result_sinks = []
+sink_flush_every = 50  # Records buffered before a write
+sink_flush_interval = 5.0  # Seconds after which buffered records are written regardless
+
+
+class ResultSink:
+    # Buffers records and writes them in batches, so output can be tailed while the sweep runs. A timer
+    # thread writes records left waiting sink_flush_interval seconds while no new result arrives
+    # (byte-budget and deadline waits, slow extractions).
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self.path = path
+        self.buffer = []
+        self.lock = threading.Lock()
+        self.flushed_at = time.monotonic()
+        self.open()
+        self.closed = threading.Event()
+        threading.Thread(target=self.flush_periodically, daemon=True).start()
+
+    def flush_periodically(self):
+        delay = sink_flush_interval
+        while not self.closed.wait(delay):
+            with self.lock:
+                if self.buffer is None:
+                    return
+                due = self.flushed_at + sink_flush_interval - time.monotonic()
+                if self.buffer and due <= 0:
+                    self._flush()
+                    due = sink_flush_interval
+                delay = max(0.1, due if self.buffer else sink_flush_interval)
+
+    def emit(self, record):
+        with self.lock:
+            self.buffer.append(record)
+            if len(self.buffer) >= sink_flush_every or time.monotonic() - self.flushed_at >= sink_flush_interval:
+                self._flush()
+
+    def flush(self):
+        with self.lock:
+            self._flush()
+
+    def _flush(self):
+        if self.buffer:
+            with metrics.timer("sink_write"):
+                self.write(self.buffer)
+            self.buffer = []
+        self.flushed_at = time.monotonic()
+
+    def close(self):
+        with self.lock:
+            if self.buffer is None:
+                return
+            self._flush()
+            self.buffer = None
+            self.closed.set()
+            self.finish()
+
+
+class CSVSink(ResultSink):
+    def open(self):
+        new_file = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        self.file = open(self.path, 'a', newline='', encoding='utf-8')
+        self.writer = csv.writer(self.file)
+        if new_file:
+            self.writer.writerow(result_fields)
+            self.file.flush()
+
+    def write(self, records):
+        for record in records:
+            self.writer.writerow([json.dumps(record[field]) if field == "metadata" else record[field] for field in result_fields])
+        self.file.flush()
+
+    def finish(self):
+        self.file.close()
+
+
+class JSONLSink(ResultSink):
+    def open(self):
+        self.file = open(self.path, 'a', encoding='utf-8')
+
+    def write(self, records):
+        self.file.write(''.join(json.dumps(record) + '\n' for record in records))
+        self.file.flush()
+
+    def finish(self):
+        self.file.close()
+
+
+class SQLiteSink(ResultSink):
+    def open(self):
+        import sqlite3
+        self.connection = sqlite3.connect(self.path, check_same_thread=False)
+        with self.connection:
+            self.connection.execute(f"CREATE TABLE IF NOT EXISTS results ({', '.join(result_fields)})")
+
+    def write(self, records):
+        with self.connection:
+            self.connection.executemany(f"INSERT INTO results VALUES ({', '.join('?' * len(result_fields))})",
+                                        [[json.dumps(record[field]) if field == "metadata" else record[field] for field in result_fields]
+                                         for record in records])
+
+    def finish(self):
+        self.connection.close()
+
+
+result_sink_types = {".csv": CSVSink, ".jsonl": JSONLSink, ".sqlite": SQLiteSink, ".db": SQLiteSink}
+
+
+def open_result_sink(path):
+    sink = result_sink_types[os.path.splitext(path)[1].lower()](path)
+    result_sinks.append(sink)
+    atexit.register(sink.close)  # Ctrl-C and sys.exit from the menus still write what is buffered
+    return sink
+
+
+def emit_result(domain, filetype, original, timestamp, digest, outcome, metadata):
+    if not result_sinks:
+        return
+    record = {
+        "domain": domain,
+        "filetype": filetype,
+        "original": original,
+        "timestamp": str(timestamp),
+        "download_url": f"{download.wayback_base_url}/web/{timestamp}/{original}",
+        "digest": digest,
+        "outcome": outcome,
+        "metadata": metadata,
+        "tested_at": round(time.time(), 3),
+    }
+    for sink in result_sinks:
+        sink.emit(record)
+
+
+def flush_result_sinks():
+    for sink in result_sinks:
+        sink.flush()
+
+
+class SweepJournal:
+    # Append-only JSON lines journal for one (domain, extension, strictness) sweep
+    def __init__(self, domain, filetype, strictness, resume=False):
+        name = re.sub(r'[^\w.-]', '_', f"{domain}_{filetype}_s{strictness}")
+        self.path = f"./cache/journal_{name}.jsonl"
+        self.completed = {}
+        if resume and os.path.exists(self.path):
+            with open(self.path, encoding='utf-8') as journal:
+                for line in journal:
+                    try:
+                        original, timestamp, outcome, metadata = json.loads(line)
+                    except ValueError:
+                        break  # A line cut short by a crash; everything after it is lost anyway
+                    self.completed[(original, timestamp)] = (outcome, metadata)
+        elif os.path.exists(self.path):
+            print(f"{blue_start}Discarding the checkpoint of an earlier unfinished sweep (use --resume to continue it instead).{blue_end}")
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        # Rewrite the journal from what was read, which also drops a truncated last line
+        self.file = open(self.path, 'w', encoding='utf-8')
+        for (original, timestamp), (outcome, metadata) in self.completed.items():
+            self.file.write(json.dumps([original, timestamp, outcome, metadata]) + '\n')
+        self.file.flush()
+        self.lock = threading.Lock()
+
+    def lookup(self, original, timestamp):
+        return self.completed.get((original, str(timestamp)))
+
+    def record(self, original, timestamp, outcome, metadata):
+        with self.lock:
+            self.file.write(json.dumps([original, str(timestamp), outcome, metadata]) + '\n')
+            self.file.flush()
+
+    def close(self, finished=False):
+        # A finished sweep needs no checkpoint; an interrupted one keeps it for --resume
+        self.file.close()
+        if finished:
+            os.remove(self.path)
+
+
+def print_stored_results(domain, filetype=None):
+    results = get_results_store().query(domain, filetype)
+    if not results:
+        print(f"No stored results for {domain}{f' ({filetype})' if filetype else ''}.")
+        return
+    hits = 0
+    for original, timestamp, outcome, metadata, tested_at in results:
+        if outcome == "metadata":
+            hits += 1
+            found = ', '.join(f"{key}: {value}" for key, value in metadata.items() if key in highlight_keys and key != "File Name")
+            print(f"{green_start}[+]{green_end} {timestamp} {original}  {found}")
+        else:
+            print(f"{red_start}[-]{red_end} {timestamp} {original}  ({outcome.replace('_', ' ')})")
+    print(f"\n{hits}/{len(results)} stored results contained targeted metadata.")
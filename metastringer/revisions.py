@@ -0,0 +1,163 @@
+# Other revisions of matched files. The listing keeps one capture per URL (collapse=urlkey), but its
+# uniqcount says how many distinct payloads were archived; for URLs with more than one, CDX lookups
+# list the other payloads so a full sweep can test each revision once.
+
+import re
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote, urlparse
+
+from . import download
+from .cdx import iter_json_rows, iter_response_text
+from .classify import find_mime_type, get_file_list_index
+from .console import blue_start, blue_end, green_start, green_end, red_start, red_end, italics_start, italics_end
+from .download import http_get
+from .instrumentation import metrics, profiled
+
+
+# --revisions: also test the other distinct payloads of matched URLs
+mine_revisions = False
+# CDX lookups one sweep may spend on finding revisions (--max-revision-lookups)
+revision_lookup_cap = 50
+# Matched URLs in one directory are looked up together: one prefix query filtered to their paths
+revision_batch_size = 20
+# Other revisions tested per URL at most (the newest are kept)
+revisions_per_url = 10
+revision_fields = "original,mimetype,timestamp,digest,length"
+# Concurrent revision lookups
+revision_workers = 4
+
+
+def listing_revision_counts(file_list, matching_urls, filetype, strictness):
+    # {original URL: uniqcount} for matched URLs whose listing row records more than one distinct payload
+    header = file_list[0]
+    if "uniqcount" not in header:
+        return {}
+    url_column, count_column = header.index("original"), header.index("uniqcount")
+    matched = {match[0] for match in matching_urls}
+    counts = {}
+    for position in get_file_list_index(file_list).candidates('.' + filetype, find_mime_type(filetype, strictness)):
+        item = file_list[position + 1]
+        count = int(item[count_column]) if str(item[count_column]).isdigit() else 1
+        if count > 1 and item[url_column] in matched:
+            counts[item[url_column]] = count
+    return counts
+
+
+def plan_revision_lookups(counts):
+    # Batches of up to revision_batch_size URLs sharing a directory, most expected revisions first,
+    # trimmed to revision_lookup_cap lookups
+    directories = defaultdict(list)
+    for url in counts:
+        directories[url.rsplit('/', 1)[0] + '/'].append(url)
+    batches = []
+    for directory, urls in directories.items():
+        for start in range(0, len(urls), revision_batch_size):
+            batches.append((directory, urls[start:start + revision_batch_size]))
+    batches.sort(key=lambda batch: -sum(counts[url] - 1 for url in batch[1]))
+    return batches[:max(0, revision_lookup_cap)]
+
+
+def revision_query_url(directory, urls):
+    # A single URL is an exact lookup; several are one prefix query whose rows are filtered server-side
+    # to their paths (any scheme, with or without www, as the listing collapses those together)
+    base = f"{download.wayback_base_url}/web/timemap/?output=json&collapse=digest&fl={quote(revision_fields, safe='')}&filter=!statuscode%3A%5B45%5D.."
+    if len(urls) == 1:
+        return f"{base}&matchType=exact&url={quote(urls[0], safe='')}"
+    parsed = urlparse(directory)
+    host = parsed.hostname[4:] if parsed.hostname.startswith("www.") else parsed.hostname
+    paths = '|'.join(re.escape(url.split('/', 3)[3]) for url in urls)
+    pattern = f"^https?://(www\\.)?{re.escape(host)}(:[0-9]+)?/({paths})$"
+    return f"{base}&matchType=prefix&url={quote(host + parsed.path, safe='')}&filter={quote('original:' + pattern, safe='')}"
+
+
+def fetch_revision_rows(directory, urls):
+    # Returns the rows of one lookup as dicts, or [] if it failed (revisions are a bonus, not a requirement)
+    import requests
+    try:
+        response = http_get(revision_query_url(directory, urls), stream=True)
+        if response.status_code != 200:
+            response.close()
+            print(f"{red_start}Revision lookup for {directory} failed (status {response.status_code}).{red_end}")
+            return []
+        response.encoding = 'utf-8'
+        with response:
+            rows = [row for row in iter_json_rows(iter_response_text(response)) if row]
+    except requests.exceptions.RequestException as e:
+        print(f"{red_start}Revision lookup for {directory} failed ({e}).{red_end}")
+        return []
+    metrics.increment("revision_lookups")
+    return [dict(zip(rows[0], row)) for row in rows[1:]] if rows else []
+
+
+def find_revisions(file_list, matching_urls, filetype, strictness):
+    # Extra (url, timestamp, MIME type, digest, length) captures: each other distinct payload of a
+    # matched URL whose MIME type still fits the file type, at most revisions_per_url per URL
+    if not mine_revisions:
+        return []
+    counts = listing_revision_counts(file_list, matching_urls, filetype, strictness)
+    if not counts:
+        return []
+    batches = plan_revision_lookups(counts)
+    covered = sum(len(urls) for _, urls in batches)
+    print(f"{blue_start}{len(counts)} matching files have more than one archived revision; looking up {covered} of them in {len(batches)} CDX lookups.{blue_end}")
+
+    mime_types = find_mime_type(filetype, strictness)
+    # Digests already covered per URL, and the listed capture's timestamp (which identifies it when the
+    # listing has no digest, e.g. a cache written before the digest column was requested)
+    known = {match[0]: {match[3]} - {None} for match in matching_urls}
+    listed = {match[0]: str(match[1]) for match in matching_urls}
+    # Rows come back under whichever scheme/www form was captured; map them to the matched URL
+    by_path = {(urlparse(url).path, urlparse(url).query): url for url in counts}
+    found = defaultdict(list)
+    with ThreadPoolExecutor(max_workers=max(1, revision_workers)) as executor:
+        for rows in executor.map(profiled(fetch_revision_rows), [directory for directory, _ in batches], [urls for _, urls in batches]):
+            for row in rows:
+                parsed = urlparse(row.get("original", ""))
+                url = by_path.get((parsed.path, parsed.query))
+                digest = row.get("digest") or None
+                if (url is None or digest is None or digest in known[url] or row.get("timestamp") == listed[url]
+                        or row.get("mimetype") not in mime_types):
+                    continue
+                known[url].add(digest)
+                length = int(row["length"]) or None if str(row.get("length", "")).isdigit() else None
+                found[url].append((url, row.get("timestamp", ""), row.get("mimetype"), digest, length))
+
+    revisions = []
+    for url, captures in found.items():
+        captures.sort(key=lambda capture: capture[1])
+        revisions.extend(captures[-revisions_per_url:])
+    print(f"{blue_start}Found {len(revisions)} other revisions of {len(found)} files.{blue_end}")
+    return revisions
+
+
+def print_revision_report(revision_outcomes, verbosity=0):
+    # revision_outcomes: {url: [(timestamp, outcome, metadata, is_revision)]} for files with revisions tested.
+    # Lists files whose metadata differs between revisions (every file at -v); returns the revision tally.
+    tested = with_metadata = 0
+    only_in_revisions = 0
+    for outcomes in revision_outcomes.values():
+        revision_hits = [outcome == "metadata" for _, outcome, _, is_revision in outcomes if is_revision]
+        tested += len(revision_hits)
+        with_metadata += sum(revision_hits)
+        if any(revision_hits) and not any(outcome == "metadata" for _, outcome, _, is_revision in outcomes if not is_revision):
+            only_in_revisions += 1
+    found_color = green_start if with_metadata else red_start
+    print(f"\nRevisions: {found_color}{with_metadata}/{tested}{green_end} other revisions of {len(revision_outcomes)} files contained targeted metadata"
+          f" ({only_in_revisions} files only in a revision other than the listed capture).")
+    for url, outcomes in sorted(revision_outcomes.items()):
+        if verbosity < 1 and len({highlighted_values(metadata) for _, _, metadata, _ in outcomes}) < 2:
+            continue
+        print(f"  {url}")
+        for timestamp, outcome, metadata, is_revision in sorted(outcomes, key=lambda entry: entry[0]):
+            values = ', '.join(f"{key}: {value}" for key, value in highlighted_values(metadata))
+            marker = f"{green_start}[+]{green_end}" if outcome == "metadata" else f"{red_start}[-]{red_end}"
+            label = "" if is_revision else f" {italics_start}(listed capture){italics_end}"
+            print(f"    {marker} {timestamp[:4]}-{timestamp[4:6]}-{timestamp[6:8]}{label}  {values or outcome.replace('_', ' ')}")
+    return {"files": len(revision_outcomes), "tested": tested, "with_metadata": with_metadata, "only_in_revisions": only_in_revisions}
+
+
+def highlighted_values(metadata):
+    # The (key, value) pairs revisions are compared on: the highlighted keys, without the file name
+    from .extract import highlight_keys
+    return tuple((key, str(value)) for key, value in sorted(metadata.items()) if key in highlight_keys and key != "File Name")
@@ -0,0 +1,660 @@
+# Metadata sweeps over matching captures: the full sweep (option 5) and the sampling estimate (option 4)
+
+import math
+import os
+import queue
+import random
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urlparse
+
+from . import download
+from .aggregate import get_metadata_index
+from .console import blue_start, blue_end, green_start, green_end, red_start, red_end, italics_start, italics_end
+from .download import FileTooLarge, download_file
+from .extract import extract_metadata, extract_remote_metadata, highlight_keys, print_exiftool_notice
+from .instrumentation import metrics, profiled
+from .results import SweepJournal, emit_result, flush_result_sinks, get_results_store
+from .revisions import print_revision_report
+
+
+# Global set to keep track of extensions for which option 5 has been completed
+tested_extensions = set()
+# Number of concurrent download workers used by metadata sweeps
+sweep_workers = 1
+# Full sweeps extract on their own workers; downloaded files wait in a queue of at most pipeline_depth
+extract_workers = 2
+pipeline_depth = 8
+# Set when the user chooses to break out of a running sweep
+sweep_stop = threading.Event()
+# Option 4 sampling: stop once the confidence interval on the hit rate is at most this wide
+sample_target_width = 0.2
+sample_confidence = 0.95
+sample_min_size = 20
+sample_mode = "stratified"  # or "random"
+# Captures sharing one payload digest more often than this are treated as error pages and skipped
+max_digest_repeats = 25
+# Monotonic time after which sweeps stop starting new files (batch --domain-timeout)
+sweep_deadline = None
+# Captures already in the results store are not downloaded again unless --retest is given
+reuse_results = True
+# Stored outcomes that are tried again anyway (the server may recover, or --max-size may have been raised)
+retried_outcomes = ("download_failed", "skipped_too_large")
+# Full sweeps continue from their checkpoint journal (--resume)
+resume_sweeps = False
+# Download order of full sweeps (--order): "cdx" keeps listing order, "smallest" takes the smallest
+# payloads first, "yield" the most expected metadata per byte, "sample" a representative random order.
+# None picks "sample" when a budget is set (so a partial tally is representative) and "cdx" otherwise.
+sweep_order = None
+# Budgets per full sweep (--max-bytes, --deadline); a sweep that runs out reports a partial tally
+sweep_byte_budget = None
+sweep_time_budget = None
+# Reserved against the byte budget for a capture without a CDX length, until sizes have been observed
+default_reservation = 1024 * 1024
+# --range-fetch: documents (the strictness 2 types, PDF and Office) are read with HTTP Range requests,
+# fetching the tail of the file and the parts it points to rather than every byte
+range_fetch = False
+
+
+def range_fetchable(filetype):
+    from .mappings import strictness_2_mime_mapping
+    return range_fetch and filetype is not None and filetype.lstrip('.').lower() in strictness_2_mime_mapping
+
+
+def retrieve_capture(url, archive_number, domain, rate_limit, filetype=None, length=None):
+    # Retrieves one capture for a sweep; returns (temp path, metadata, bytes transferred). Documents read
+    # through Range requests come back as (None, metadata, ...) without a temp file; otherwise the capture
+    # is downloaded and metadata is None (as is the path, if the download failed). length is the CDX
+    # length, if known; small documents are downloaded whole rather than read through ranges.
+    relative_url = url.replace(f"https://{domain}", "").replace(f"http://{domain}", "").replace(f"https://www.{domain}", "").replace(f"http://www.{domain}", "")
+    print(f"Retrieving: {relative_url} {italics_start}[{download.rate_limiter.rate:.2f} req/s]{italics_end}")
+    capture_url = f"{download.wayback_base_url}/web/{archive_number}/{url}"
+    transferred = 0
+    if range_fetchable(filetype) and not (length and length < download.range_min_length):
+        metadata, transferred = extract_remote_metadata(capture_url, os.path.basename(url.split('?')[0]) or None)
+        if metadata is not None:
+            return None, metadata, transferred
+    file_path = download_file(capture_url, bulk_operation=True, rate_limit=rate_limit)
+    return file_path, None, transferred + (os.path.getsize(file_path) if file_path else 0)
+
+
+def skipped_result(url, error):
+    # Result for a capture over --max-size: not retrieved, with the reason kept alongside the outcome
+    print(f"{blue_start}Skipped {url}: {error}{blue_end}")
+    return False, {"Skipped": f"File is {error}"}
+
+
+def failed_result(url, error):
+    # Result for a capture whose download raised (a bad redirect, a corrupt body, a temp-file write error):
+    # recorded as download_failed, so only this capture is lost and the next run retries it
+    print(f"{red_start}Failed to download {url}: {error!r}{red_end}")
+    metrics.increment("downloads_failed", reason=type(error).__name__)
+    return False, {}
+
+
+def download_errors():
+    import requests
+    return requests.exceptions.RequestException, OSError
+
+
+def test_single_file(url, archive_number, domain, rate_limit, verbosity, filetype=None, length=None):
+    # Returns None if the sweep was stopped before this file, otherwise (file_retrieved, metadata)
+    if sweep_stopped():
+        return None
+    try:
+        file_path, metadata, _ = retrieve_capture(url, archive_number, domain, rate_limit, filetype, length)
+    except FileTooLarge as e:
+        return skipped_result(url, e)
+    except download_errors() as e:
+        return failed_result(url, e)
+
+    if metadata is not None:
+        return True, metadata
+    if file_path is None:
+        return None if sweep_stopped() else (False, {})
+    try:
+        metadata = extract_metadata(file_path)
+    finally:
+        os.remove(file_path)
+    return True, metadata
+
+
+class SweepPipeline:
+    # Download workers -> bounded extraction queue -> extraction workers -> bounded result queue -> caller.
+    # The network keeps going while ExifTool runs and vice versa; a full queue holds the stage before it
+    # back, so memory and temp-disk use stay fixed however far downloads run ahead.
+    def __init__(self, groups, domain, rate_limit, byte_budget=None, filetype=None, budget_prefix=False):
+        self.domain = domain
+        self.rate_limit = rate_limit
+        self.filetype = filetype
+        self.byte_budget = byte_budget
+        # budget_prefix: stop claiming at the first capture that does not fit, so the captures tested
+        # are a prefix of the download order (which keeps a sample-order tally representative)
+        self.budget_prefix = budget_prefix
+        self.budget_exhausted = False
+        self.bytes_received = 0
+        self.bytes_reserved = 0
+        self.captures_received = 0
+        # CDX lengths of the captures received that had one, and the bytes received for those captures
+        self.lengths_received = 0
+        self.bytes_received_with_length = 0
+        self.over_budget = 0
+        self.pending = queue.Queue()
+        for group in groups:
+            self.pending.put(group)
+        self.total = len(groups)
+        self.extract_queue = queue.Queue(maxsize=max(1, pipeline_depth))
+        self.result_queue = queue.Queue(maxsize=max(1, pipeline_depth))
+        self.lock = threading.Lock()
+        self.budget_settled = threading.Condition(self.lock)
+        self.completed = {"download": 0, "extract": 0}
+        self.started = time.monotonic()
+        self.closed = False
+        self.downloaders_running = max(1, sweep_workers)
+        self.threads = [threading.Thread(target=profiled(self.download_stage), daemon=True) for _ in range(self.downloaders_running)]
+        self.threads += [threading.Thread(target=profiled(self.extract_stage), daemon=True) for _ in range(max(1, extract_workers))]
+        for thread in self.threads:
+            thread.start()
+
+    def put(self, stage_queue, item, name):
+        # Blocks while the next stage is behind; once the pipeline is closed the item is dropped
+        while not self.closed:
+            try:
+                stage_queue.put(item, timeout=0.1)
+            except queue.Full:
+                continue
+            metrics.gauge("pipeline_queue_depth", stage_queue.qsize(), queue=name)
+            return
+        if name == "extract" and item is not None:
+            os.remove(item[1])  # Downloaded but never to be extracted
+
+    def expected_bytes(self, length):
+        # Bytes a capture is expected to transfer: its CDX length (the archived record size) scaled by the
+        # ratio of bytes received to CDX length so far, or the mean size received if it has no length
+        if length:
+            return round(length * self.bytes_received_with_length / self.lengths_received) if self.lengths_received else length
+        return round(self.bytes_received / self.captures_received) if self.captures_received else default_reservation
+
+    def claim_bytes(self, length):
+        # Reserves a capture's expected size against the byte budget before it is downloaded, so concurrent
+        # downloads cannot overshoot it together; returns the reservation, or None if the capture does not fit.
+        # A capture that does not fit waits for the downloads in flight, whose real sizes may leave room
+        # for it; one without a CDX length may start alone while the budget is not yet spent.
+        if self.byte_budget is None:
+            return 0
+        with self.budget_settled:
+            while not self.budget_exhausted:
+                reservation = self.expected_bytes(length)
+                used = self.bytes_received + self.bytes_reserved
+                if used + reservation <= self.byte_budget or (not length and not self.bytes_reserved and used < self.byte_budget):
+                    self.bytes_reserved += reservation
+                    return reservation
+                if not self.bytes_reserved or self.closed or sweep_stopped():
+                    break
+                self.budget_settled.wait(0.1)
+            self.over_budget += 1
+            self.budget_exhausted = self.budget_exhausted or self.budget_prefix
+            return None
+
+    def settle_bytes(self, reservation, length, transferred):
+        # Replaces the reservation with the bytes actually received (nothing for failed or skipped downloads)
+        if self.byte_budget is not None:
+            with self.budget_settled:
+                self.budget_settled.notify_all()
+                self.bytes_reserved -= reservation
+                self.bytes_received += transferred
+                if transferred:
+                    self.captures_received += 1
+                    if length:
+                        self.lengths_received += length
+                        self.bytes_received_with_length += transferred
+
+    def finish_stage(self, stage):
+        with self.lock:
+            self.completed[stage] += 1
+        metrics.increment("pipeline_items", stage=stage)
+
+    def download_stage(self):
+        errors = download_errors()
+        while True:
+            try:
+                group = self.pending.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                url, archive_number, _, length = group[0]
+                reservation = None if sweep_stopped() else self.claim_bytes(length)
+                if reservation is None:
+                    self.put(self.result_queue, (group, None), "result")
+                    continue
+                file_path, metadata, transferred = None, None, 0
+                try:
+                    file_path, metadata, transferred = retrieve_capture(url, archive_number, self.domain, self.rate_limit, self.filetype, length)
+                finally:
+                    self.settle_bytes(reservation, length, transferred)
+                self.finish_stage("download")
+                if metadata is not None:
+                    # Read through Range requests: there is nothing left to extract
+                    self.finish_stage("extract")
+                    self.put(self.result_queue, (group, (True, metadata)), "result")
+                elif file_path is None:
+                    self.put(self.result_queue, (group, None if sweep_stopped() else (False, {})), "result")
+                else:
+                    self.put(self.extract_queue, (group, file_path), "extract")
+            except FileTooLarge as e:
+                self.put(self.result_queue, (group, skipped_result(group[0][0], e)), "result")
+            except errors as e:
+                self.put(self.result_queue, (group, failed_result(group[0][0], e)), "result")
+            except Exception as e:
+                self.put(self.result_queue, (group, e), "result")
+        with self.lock:
+            self.downloaders_running -= 1
+            last = self.downloaders_running == 0
+        if last:
+            for _ in range(max(1, extract_workers)):
+                self.put(self.extract_queue, None, "extract")  # One end marker per extraction worker
+
+    def extract_stage(self):
+        while not self.closed:
+            try:
+                item = self.extract_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if item is None:
+                return
+            group, file_path = item
+            try:
+                metadata = extract_metadata(file_path)
+                self.finish_stage("extract")
+                self.put(self.result_queue, (group, (True, metadata)), "result")
+            except Exception as e:
+                self.put(self.result_queue, (group, e), "result")
+            finally:
+                os.remove(file_path)
+
+    def results(self):
+        # Yields (group, result) as results arrive: result is None if the sweep was stopped first,
+        # otherwise (file_retrieved, metadata). A worker's exception is raised here.
+        for _ in range(self.total):
+            group, result = self.result_queue.get()
+            if isinstance(result, Exception):
+                raise result
+            yield group, result
+
+    def status(self):
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        with self.lock:
+            downloaded, extracted = self.completed["download"], self.completed["extract"]
+        return (f"downloaded {downloaded} ({downloaded / elapsed:.2f}/s), extracted {extracted} ({extracted / elapsed:.2f}/s), "
+                f"waiting for extraction {self.extract_queue.qsize()}/{self.extract_queue.maxsize}, "
+                f"results waiting {self.result_queue.qsize()}/{self.result_queue.maxsize}")
+
+    def close(self):
+        # Stops the pipeline early (Ctrl-C or a failure). Workers finish their current file and exit
+        # without blocking on a queue; files already waiting for extraction are removed.
+        self.closed = True
+        sweep_stop.set()
+        while True:
+            try:
+                item = self.extract_queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                os.remove(item[1])
+
+
+def sweep_stopped():
+    return sweep_stop.is_set() or (sweep_deadline is not None and time.monotonic() >= sweep_deadline)
+
+
+def has_targeted_metadata(metadata):
+    return any(key in metadata for key in highlight_keys if key != "File Name" and key != "Error")
+
+
+def plan_digest_groups(captures):
+    # Groups (url, timestamp, digest, length) captures by payload digest, keeping first-seen order.
+    # Returns the groups to download (one download each) and the captures skipped because
+    # their digest repeats so often it is almost certainly an error or placeholder page.
+    groups = {}
+    for capture in captures:
+        key = capture[2] or (capture[0], capture[1])  # Captures without a digest stand alone
+        groups.setdefault(key, []).append(capture)
+    download_groups, skipped = [], []
+    for key, group in groups.items():
+        if isinstance(key, str) and len(group) > max_digest_repeats:
+            skipped.extend(group)
+        else:
+            download_groups.append(group)
+    return download_groups, skipped
+
+
+def order_download_groups(groups, order, domain, filetype):
+    # Orders digest groups for download. "smallest" and "yield" use the CDX length (the archived record
+    # size, close to the payload size); captures without one go last. "yield" ranks by captures covered
+    # times the stored hit rate of the capture's path prefix (smoothed towards the overall rate), per byte.
+    if order == "sample":
+        keyed = sample_order([(group[0][0], group[0][1], group) for group in groups], sample_mode)
+        return [group for _, _, group in keyed]
+    if order == "smallest":
+        return sorted(groups, key=lambda group: (group[0][3] is None, group[0][3] or 0))
+    if order != "yield":
+        return groups
+    tested, hits = defaultdict(int), defaultdict(int)
+    for original, _, outcome, _, _ in get_results_store().query(domain, filetype):
+        if outcome in ("metadata", "no_metadata"):
+            tested[path_prefix(original)] += 1
+            hits[path_prefix(original)] += outcome == "metadata"
+    overall = (sum(hits.values()) + 1) / (sum(tested.values()) + 2)
+
+    def expected_yield_per_byte(group):
+        prefix = path_prefix(group[0][0])
+        hit_rate = (hits[prefix] + 2 * overall) / (tested[prefix] + 2)
+        return len(group) * hit_rate / max(group[0][3] or 0, 1024)
+    return sorted(groups, key=lambda group: (group[0][3] is None, -expected_yield_per_byte(group)))
+
+
+def result_outcome(file_retrieved, metadata):
+    if not file_retrieved:
+        return "skipped_too_large" if "Skipped" in metadata else "download_failed"
+    return "metadata" if has_targeted_metadata(metadata) else "no_metadata"
+
+
+def test_files_for_metadata(matching_urls, filetype, domain, rate_limit, portion, verbosity, strictness=1, revisions=()):
+    # revisions: other captures of matched URLs (find_revisions); they are tested alongside but
+    # tallied per revision, so the headline figures stay one capture per file
+    # Initialize percentage to a default value
+    percentage = 0.0
+    user_broke_loop = False
+    sweep_stop.clear()
+
+    print_exiftool_notice()
+
+    if portion:
+        return sample_files_for_metadata(matching_urls, filetype, domain, rate_limit, verbosity)
+
+    tested_extensions.add(filetype)  # Testing all files (Option 5)
+    budgeted = sweep_byte_budget is not None or sweep_time_budget is not None
+    order = sweep_order or ("sample" if budgeted else "cdx")
+
+    files_with_metadata = 0
+    total_files_tested = 0
+    revision_keys = {(capture[0], capture[1]) for capture in revisions}
+    revision_outcomes = defaultdict(list) if revisions else None
+    revisioned_urls = {capture[0] for capture in revisions}
+
+    def count(url, archive_number, outcome, metadata):
+        nonlocal files_with_metadata, total_files_tested
+        if url in revisioned_urls:
+            revision_outcomes[url].append((archive_number, outcome, metadata, (url, archive_number) in revision_keys))
+        if (url, archive_number) not in revision_keys:
+            total_files_tested += 1
+            files_with_metadata += outcome == "metadata"
+
+    store = get_results_store()
+    index = get_metadata_index()
+    journal = SweepJournal(domain, filetype, strictness, resume_sweeps)
+
+    # Captures completed before an interruption (--resume) were already counted and streamed, and
+    # captures already in the results store count towards the tally without being downloaded again
+    untested = []
+    resumed = reused = 0
+    for url, archive_number, _, digest, length in list(matching_urls) + list(revisions):
+        completed = journal.lookup(url, archive_number)
+        if completed:
+            resumed += 1
+            count(url, archive_number, completed[0], completed[1])
+            continue
+        stored = store.lookup(url, archive_number, digest) if reuse_results else None
+        if stored and stored[0] not in retried_outcomes:
+            reused += 1
+            count(url, archive_number, stored[0], stored[1])
+            journal.record(url, archive_number, stored[0], stored[1])
+            emit_result(domain, filetype, url, archive_number, digest, stored[0], stored[1])
+            index.add(domain, filetype, url, archive_number, stored[1])
+        else:
+            untested.append((url, archive_number, digest, length))
+    if resumed:
+        print(f"{blue_start}Resuming: {resumed} captures were completed before the sweep was interrupted.{blue_end}")
+    if reused:
+        print(f"{blue_start}{reused} captures already tested; using stored results (--retest to test them again).{blue_end}")
+
+    # Identical payloads are downloaded once; the result is copied to every capture that shares the digest
+    download_groups, skipped = plan_digest_groups(untested)
+    if len(download_groups) < len(untested) - len(skipped):
+        print(f"{blue_start}{len(untested) - len(skipped)} captures share {len(download_groups)} distinct payloads; each payload is downloaded once.{blue_end}")
+    if skipped:
+        print(f"{blue_start}Skipping {len(skipped)} captures whose payload repeats more than {max_digest_repeats} times (likely error pages).{blue_end}")
+    # Skipped captures are reported apart from the tested ones and left out of the estimated population
+    skipped_repeats = sum((url, archive_number) not in revision_keys for url, archive_number, _, _ in skipped)
+    population = len(matching_urls) - skipped_repeats
+
+    download_groups = order_download_groups(download_groups, order, domain, filetype)
+    if budgeted:
+        limits = [f"{sweep_byte_budget / 1024 / 1024:.1f} MB" if sweep_byte_budget is not None else "",
+                  f"{sweep_time_budget:g} s" if sweep_time_budget is not None else ""]
+        print(f"{blue_start}Budget: {' and '.join(limit for limit in limits if limit)}, testing in {order} order.{blue_end}")
+
+    # --deadline starts counting now; a batch --domain-timeout that ends sooner still applies
+    global sweep_deadline
+    previous_deadline = sweep_deadline
+    if sweep_time_budget is not None:
+        sweep_deadline = min(deadline for deadline in (previous_deadline, time.monotonic() + sweep_time_budget) if deadline is not None)
+
+    pipeline = SweepPipeline(download_groups, domain, rate_limit, sweep_byte_budget, filetype, budget_prefix=order == "sample")
+    last_status = time.monotonic()
+    try:
+        for group, result in pipeline.results():
+            if verbosity >= 1 and time.monotonic() - last_status >= 5:
+                last_status = time.monotonic()
+                print(f"{italics_start}Pipeline: {pipeline.status()}{italics_end}")
+            if result is None:  # None indicates the user broke out of the sweep
+                user_broke_loop = True
+                continue
+            file_retrieved, metadata = result
+            metadata_match_found = has_targeted_metadata(metadata)
+            outcome = result_outcome(file_retrieved, metadata)
+            for url, archive_number, digest, _ in group:
+                count(url, archive_number, outcome, metadata)
+                store.record(url, archive_number, outcome, metadata, domain, filetype, digest)
+                journal.record(url, archive_number, outcome, metadata)
+                emit_result(domain, filetype, url, archive_number, digest, outcome, metadata)
+                index.add(domain, filetype, url, archive_number, metadata)
+            if metadata_match_found:
+                if verbosity >= 1:
+                    print(f"{green_start}[+]{green_end} Metadata found")
+            elif verbosity >= 1:
+                print(f"{red_start}[-]{red_end} No metadata found")
+    except BaseException:
+        # Ctrl-C or a failing worker: stop the remaining files instead of leaving them running
+        pipeline.close()
+        journal.close()
+        print(f"\n{blue_start}Sweep interrupted after {total_files_tested} of {len(matching_urls)} captures; run again with --resume to continue.{blue_end}")
+        raise
+    finally:
+        sweep_deadline = previous_deadline
+    flush_result_sinks()
+    journal.close(finished=not user_broke_loop)
+    download.remove_worker_directories()
+    if verbosity >= 1 and download_groups:
+        print(f"{italics_start}Pipeline: {pipeline.status()}{italics_end}")
+    if pipeline.over_budget:
+        print(f"{blue_start}Byte budget reached: {pipeline.bytes_received / 1024 / 1024:.1f} MB downloaded, {pipeline.over_budget} payloads left untested.{blue_end}")
+        metrics.increment("budget_skipped", pipeline.over_budget)
+    if user_broke_loop:
+        print(f"{blue_start}Progress is checkpointed; run again with --resume to test the remaining captures.{blue_end}")
+
+    # Calculate the percentage if files were tested
+    percentage = (files_with_metadata / total_files_tested) * 100 if total_files_tested > 0 else 0
+
+    # Adjusting message formatting and colors based on the count
+    found_color = green_start if files_with_metadata > 0 else red_start
+    tested_color = blue_start if user_broke_loop else found_color
+    percent_color = green_start if files_with_metadata > 0 else red_start
+
+    summary = {
+        "filetype": filetype,
+        "matching": len(matching_urls),
+        "tested": total_files_tested,
+        "skipped_repeats": skipped_repeats,
+        "with_metadata": files_with_metadata,
+        "percentage": round(percentage, 2),
+        "complete": not user_broke_loop,
+    }
+    skipped_note = f", {skipped_repeats} skipped as repeated payloads" if skipped_repeats else ""
+    if user_broke_loop:
+        print(f"\n{found_color}{files_with_metadata}{green_end}/{tested_color}{total_files_tested}{green_end} tested files ({percent_color}{percentage:.2f}%{green_end}) of the {blue_start}{len(matching_urls)}{green_end} total contained targeted metadata{skipped_note}.")
+        summary["order"] = order
+        summary["representative"] = order == "sample"
+        if total_files_tested and order == "sample":
+            # A partial sweep in sample order tested a prefix of a random order (budgets stop at the first
+            # capture that does not fit), which is a random sample of the captures, so the hit rate generalises
+            from statistics import NormalDist
+            z = NormalDist().inv_cdf(0.5 + sample_confidence / 2)
+            low, high = wilson_interval(files_with_metadata, total_files_tested, population, z)
+            summary["interval"] = [round(low * 100, 2), round(high * 100, 2)]
+            print(f"Estimated {sample_confidence:.0%} interval {low:.1%} - {high:.1%} for all {population} files (about {round(files_with_metadata / total_files_tested * population)} files).")
+        elif total_files_tested:
+            print(f"{italics_start}Captures were tested in {order} order, so the tested files are not a representative sample and no estimate is given; --order sample gives a representative partial tally.{italics_end}")
+    else:
+        print(f"\n{found_color}{files_with_metadata}/{total_files_tested} ({percentage:.2f}%){green_end} tested files contained targeted metadata{skipped_note}.")
+    if revision_outcomes:
+        summary["revisions"] = print_revision_report(revision_outcomes, verbosity)
+
+    return summary
+
+
+def path_prefix(url):
+    path = urlparse(url).path.strip('/')
+    return path.split('/', 1)[0] if '/' in path else ''
+
+
+def sample_order(matching_urls, mode="stratified"):
+    # Random order in which any prefix is a representative sample. In stratified mode every
+    # (capture year, first path segment) stratum is spread evenly through the order, so a prefix
+    # holds each stratum in proportion to its size.
+    if mode != "stratified":
+        order = list(matching_urls)
+        random.shuffle(order)
+        return order
+    strata = defaultdict(list)
+    for item in matching_urls:
+        strata[(str(item[1])[:4], path_prefix(item[0]))].append(item)
+    keyed = []
+    for items in strata.values():
+        random.shuffle(items)
+        offset = random.random()
+        keyed.extend(((position + offset) / len(items), item) for position, item in enumerate(items))
+    keyed.sort(key=lambda pair: pair[0])
+    return [item for _, item in keyed]
+
+
+def wilson_interval(hits, tested, population, z):
+    # Wilson score interval for the hit rate, narrowed towards the observed rate by the finite population
+    # correction (the Wilson interval always contains it), so a census gives exactly the observed rate
+    if tested == 0:
+        return 0.0, 1.0
+    p = hits / tested
+    denominator = 1 + z * z / tested
+    centre = (p + z * z / (2 * tested)) / denominator
+    half_width = z * math.sqrt(p * (1 - p) / tested + z * z / (4 * tested * tested)) / denominator
+    low, high = max(0.0, centre - half_width), min(1.0, centre + half_width)
+    if population > 1:
+        correction = math.sqrt(max(0, population - tested) / (population - 1))
+        low, high = p - (p - low) * correction, p + (high - p) * correction
+    return low, high
+
+
+def sample_files_for_metadata(matching_urls, filetype, domain, rate_limit, verbosity):
+    # Option 4: tests files in a representative random order until the confidence interval on the
+    # share of files with targeted metadata is narrow enough
+    from statistics import NormalDist
+    # Captures of a payload repeated more than max_digest_repeats times are skipped as in full sweeps,
+    # and the estimate covers the remaining population
+    _, skipped = plan_digest_groups([(url, archive_number, digest, length) for url, archive_number, _, digest, length in matching_urls])
+    skipped_keys = {(url, archive_number) for url, archive_number, _, _ in skipped}
+    if skipped:
+        print(f"{blue_start}Skipping {len(skipped)} captures whose payload repeats more than {max_digest_repeats} times (likely error pages).{blue_end}")
+    candidates = [item for item in matching_urls if (item[0], item[1]) not in skipped_keys]
+    population = len(candidates)
+    z = NormalDist().inv_cdf(0.5 + sample_confidence / 2)
+    store = get_results_store()
+    index = get_metadata_index()
+    pending = iter(sample_order(candidates, sample_mode))
+    hits = 0
+    tested = 0
+    low, high = 0.0, 1.0
+    in_flight = {}
+
+    def observe(found):
+        nonlocal hits, tested, low, high
+        tested += 1
+        if found:
+            hits += 1
+        low, high = wilson_interval(hits, tested, population, z)
+
+    def precise_enough():
+        return tested >= min(sample_min_size, population) and high - low <= sample_target_width
+
+    print(f"Sampling until the {sample_confidence:.0%} interval is within {sample_target_width * 100:.0f} points ({sample_mode} sample of {population} files)\n")
+    executor = ThreadPoolExecutor(max_workers=sweep_workers)
+    try:
+        while True:
+            # Keep every worker busy, but stop drawing as soon as the estimate is precise enough
+            while len(in_flight) < sweep_workers and not precise_enough() and not sweep_stopped():
+                item = next(pending, None)
+                if item is None:
+                    break
+                url, archive_number, _, digest, length = item
+                stored = store.lookup(url, archive_number, digest) if reuse_results else None
+                if stored and stored[0] not in retried_outcomes:
+                    emit_result(domain, filetype, url, archive_number, digest, stored[0], stored[1])
+                    index.add(domain, filetype, url, archive_number, stored[1])
+                    observe(stored[0] == "metadata")
+                    continue
+                in_flight[executor.submit(profiled(test_single_file), url, archive_number, domain, rate_limit, verbosity, filetype, length)] = (url, archive_number, digest)
+            if not in_flight:
+                break
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                url, archive_number, digest = in_flight.pop(future)
+                result = future.result()
+                if result is None:
+                    continue
+                file_retrieved, metadata = result
+                outcome = result_outcome(file_retrieved, metadata)
+                store.record(url, archive_number, outcome, metadata, domain, filetype, digest)
+                emit_result(domain, filetype, url, archive_number, digest, outcome, metadata)
+                index.add(domain, filetype, url, archive_number, metadata)
+                if not file_retrieved:
+                    continue  # A failed download says nothing about the hit rate
+                observe(outcome == "metadata")
+                if verbosity >= 1:
+                    print(f"  {hits}/{tested} with metadata, {sample_confidence:.0%} interval {low:.1%} - {high:.1%}")
+    except BaseException:
+        sweep_stop.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+        raise
+    executor.shutdown()
+    flush_result_sinks()
+    download.remove_worker_directories()
+
+    estimate = hits / tested if tested else 0.0
+    found_color = green_start if hits > 0 else red_start
+    print(f"\n{found_color}{hits}/{tested}{green_end} sampled files contained targeted metadata.")
+    print(f"Estimated {found_color}{estimate:.1%}{green_end} of the {blue_start}{population}{blue_end} files "
+          f"({sample_confidence:.0%} interval {low:.1%} - {high:.1%}, about {round(estimate * population)} files).")
+    if not precise_enough():
+        print(f"{italics_start}Sample ended before reaching the target width.{italics_end}")
+
+    return {
+        "filetype": filetype,
+        "matching": len(matching_urls),
+        "tested": tested,
+        "skipped_repeats": len(skipped),
+        "with_metadata": hits,
+        "percentage": round(estimate * 100, 2),
+        "interval": [round(low * 100, 2), round(high * 100, 2)],
+        "complete": precise_enough(),
+    }